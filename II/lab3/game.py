@@ -1,8 +1,11 @@
+import argparse
+import json
+import time
 import pygame
 import numpy as np
 import random
 import math
-from typing import List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Union
 
 # Инициализация Pygame
 pygame.init()
@@ -92,6 +95,156 @@ class Wall:
         
         return False, np.array([0.0, 0.0])
 
+class WallSet:
+    """
+    Набор стен в массивах: начала, векторы и нормали всех отрезков
+
+    Расстояния, отталкивание и коррекции столкновений считаются сразу для
+    всех пар (пешеход, стена). Широкая фаза - сетка по ограничивающим
+    прямоугольникам стен, расширенным на reach: точка проверяется только
+    со стенами своей клетки, и только если попадает в прямоугольник стены,
+    расширенный на радиус запроса.
+    """
+
+    def __init__(self, walls: List[Wall], reach: float = 40.0, cell_size: float = 80.0):
+        self.walls = walls
+        self.reach = reach
+        self.cell_size = cell_size
+        self.start = np.array([wall.start for wall in walls], dtype=float).reshape(-1, 2)
+        self.vec = np.array([wall.end - wall.start for wall in walls], dtype=float).reshape(-1, 2)
+        self.normal = np.array([wall.normal for wall in walls], dtype=float).reshape(-1, 2)
+        self.length_sq = np.einsum('ij,ij->i', self.vec, self.vec)
+        self.box_min = np.minimum(self.start, self.start + self.vec)
+        self.box_max = np.maximum(self.start, self.start + self.vec)
+        self._build_grid()
+
+    def _build_grid(self):
+        """Клетки сетки -> стены, чьи прямоугольники (+reach) их задевают (формат CSR)"""
+        if not self.walls:
+            self.origin = np.zeros(2)
+            self.grid_shape = (0, 0)
+            self.cell_offsets = np.zeros(1, dtype=np.int64)
+            self.cell_walls = np.empty(0, dtype=np.int64)
+            return
+        self.origin = self.box_min.min(axis=0) - self.reach
+        low = np.floor((self.box_min - self.reach - self.origin) / self.cell_size).astype(np.int64)
+        high = np.floor((self.box_max + self.reach - self.origin) / self.cell_size).astype(np.int64)
+        self.grid_shape = (int(high[:, 0].max()) + 1, int(high[:, 1].max()) + 1)
+
+        keys, owners = [], []
+        for wall in range(len(self.walls)):
+            xs = np.arange(low[wall, 0], high[wall, 0] + 1)
+            ys = np.arange(low[wall, 1], high[wall, 1] + 1)
+            cell_keys = (ys[:, None] * self.grid_shape[0] + xs[None, :]).ravel()
+            keys.append(cell_keys)
+            owners.append(np.full(len(cell_keys), wall, dtype=np.int64))
+        keys = np.concatenate(keys)
+        owners = np.concatenate(owners)
+        order = np.argsort(keys, kind='stable')
+        self.cell_walls = owners[order]
+        counts = np.bincount(keys, minlength=self.grid_shape[0] * self.grid_shape[1])
+        self.cell_offsets = np.concatenate([[0], np.cumsum(counts)])
+        # Те же данные списками - для запросов одной точки без накладных расходов numpy
+        self._cell_lists = [self.cell_walls[a:b].tolist()
+                            for a, b in zip(self.cell_offsets[:-1], self.cell_offsets[1:])]
+        self._boxes = [tuple(low) + tuple(high) for low, high in zip(self.box_min, self.box_max)]
+
+    def near(self, point: np.ndarray, radius: float) -> List[Wall]:
+        """Стены, в расширенный на radius прямоугольник которых попадает точка"""
+        if radius > self.reach:
+            return self.walls
+        cell_x = int((point[0] - self.origin[0]) // self.cell_size)
+        cell_y = int((point[1] - self.origin[1]) // self.cell_size)
+        if not (0 <= cell_x < self.grid_shape[0] and 0 <= cell_y < self.grid_shape[1]):
+            return []
+        x, y = float(point[0]), float(point[1])
+        nearby = []
+        for wall in self._cell_lists[cell_y * self.grid_shape[0] + cell_x]:
+            min_x, min_y, max_x, max_y = self._boxes[wall]
+            if min_x - radius <= x <= max_x + radius and min_y - radius <= y <= max_y + radius:
+                nearby.append(self.walls[wall])
+        return nearby
+
+    def _candidate_pairs(self, points: np.ndarray, radius: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Широкая фаза: пары (точка, стена), где точка в прямоугольнике стены +radius"""
+        if radius.size and radius.max() > self.reach:
+            # Радиус больше запаса сетки - проверяются все стены
+            agents = np.repeat(np.arange(len(points)), len(self.walls))
+            walls = np.tile(np.arange(len(self.walls)), len(points))
+        else:
+            cells = np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+            inside = np.flatnonzero((cells[:, 0] >= 0) & (cells[:, 0] < self.grid_shape[0])
+                                    & (cells[:, 1] >= 0) & (cells[:, 1] < self.grid_shape[1]))
+            keys = cells[inside, 1] * self.grid_shape[0] + cells[inside, 0]
+            lo = self.cell_offsets[keys]
+            counts = self.cell_offsets[keys + 1] - lo
+            total = int(counts.sum())
+            agents = np.repeat(inside, counts)
+            starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+            walls = self.cell_walls[starts + np.arange(total)]
+        pad = radius[agents, None]
+        in_box = np.all((points[agents] >= self.box_min[walls] - pad)
+                        & (points[agents] <= self.box_max[walls] + pad), axis=1)
+        return agents[in_box], walls[in_box]
+
+    def _closest(self, points: np.ndarray, agents: np.ndarray, walls: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Расстояния до стен и направления от ближайших точек стен (Wall.distance_to_point)"""
+        to_point = points[agents] - self.start[walls]
+        length_sq = self.length_sq[walls]
+        t = np.einsum('ij,ij->i', to_point, self.vec[walls])
+        t = np.clip(np.divide(t, length_sq, out=np.zeros_like(t), where=length_sq > 0), 0, 1)
+        direction = to_point - t[:, None] * self.vec[walls]
+        return np.sqrt(np.einsum('ij,ij->i', direction, direction)), direction
+
+    def repulsion(self, points: np.ndarray, radius: np.ndarray) -> np.ndarray:
+        """Суммарная сила отталкивания от стен для каждой точки (Wall.get_repulsion_force)"""
+        agents, walls = self._candidate_pairs(points, radius)
+        distance, direction = self._closest(points, agents, walls)
+        near = distance <= radius[agents]
+        agents, walls, distance, direction = agents[near], walls[near], distance[near], direction[near]
+        r = radius[agents]
+        on_wall = distance == 0
+        force = np.where(on_wall[:, None], self.normal[walls] * r[:, None],
+                         direction / np.where(on_wall, 1.0, distance)[:, None]
+                         * ((r - distance) / r * 100)[:, None])
+        return np.stack([np.bincount(agents, weights=force[:, 0], minlength=len(points)),
+                         np.bincount(agents, weights=force[:, 1], minlength=len(points))],
+                        axis=1).astype(float)
+
+    def collisions(self, points: np.ndarray, radius: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Коррекции столкновений (Wall.check_collision) для всех пар
+
+        Returns:
+            индексы точек и корректирующие векторы для пар с пересечением
+        """
+        agents, walls = self._candidate_pairs(points, radius)
+        distance, direction = self._closest(points, agents, walls)
+        hit = distance < radius[agents]
+        agents, walls, distance, direction = agents[hit], walls[hit], distance[hit], direction[hit]
+        depth = (radius[agents] - distance)[:, None]
+        on_wall = distance == 0
+        correction = np.where(on_wall[:, None], self.normal[walls] * depth,
+                              direction / np.where(on_wall, 1.0, distance)[:, None] * depth)
+        return agents, correction
+
+    def resolve_collisions(self, position: np.ndarray, velocity: np.ndarray, radius: np.ndarray):
+        """
+        Выталкивание из стен и частичное отражение скорости (на месте)
+
+        Коррекции от всех стен считаются по одному положению и складываются;
+        при касании одной стены это совпадает с поочерёдной обработкой.
+        """
+        agents, correction = self.collisions(position, radius)
+        if len(agents) == 0:
+            return
+        length = np.sqrt(np.einsum('ij,ij->i', correction, correction))
+        normal = np.zeros_like(correction)
+        normal[length > 0] = correction[length > 0] / length[length > 0, None]
+        reflection = 2 * np.einsum('ij,ij->i', velocity[agents], normal)[:, None] * normal * 0.3
+        np.add.at(position, agents, correction)
+        np.add.at(velocity, agents, -reflection)
+
 class Exit:
     """Класс для представления выхода"""
     def __init__(self, position: Tuple[float, float], width: float = 40):
@@ -127,7 +280,7 @@ class Pedestrian:
         self.color = (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255))
         self.reached_goal = False
     
-    def update(self, neighbors: List['Pedestrian'], walls: List[Wall], dt: float):
+    def update(self, neighbors: List['Pedestrian'], walls: Union[List[Wall], WallSet], dt: float):
         """Обновление состояния пешехода"""
         if self.reached_goal:
             return
@@ -179,8 +332,11 @@ class Pedestrian:
             self.reached_goal = True
             self.goal.reached_count += 1
     
-    def resolve_wall_collisions(self, walls: List[Wall]):
+    def resolve_wall_collisions(self, walls: Union[List[Wall], WallSet]):
         """Разрешение столкновений со стенами"""
+        if isinstance(walls, WallSet):
+            # Запас в радиус - на сдвиг коррекциями от предыдущих стен
+            walls = walls.near(self.position, 2 * self.radius)
         for wall in walls:
             collision, correction = wall.check_collision(self.position, self.radius)
             if collision:
@@ -190,14 +346,15 @@ class Pedestrian:
                 self.velocity -= 2 * np.dot(self.velocity, normal) * normal * 0.3  # частичное отражение
     
     def get_nearby_neighbors(self, neighbors: List['Pedestrian']) -> List['Pedestrian']:
-        """Получение соседей в радиусе восприятия"""
-        nearby = []
-        for neighbor in neighbors:
-            if neighbor != self and not neighbor.reached_goal:
-                distance = np.linalg.norm(self.position - neighbor.position)
-                if distance < self.perception_radius:
-                    nearby.append(neighbor)
-        return nearby
+        """Получение соседей в радиусе восприятия (расстояния - одним массивом)"""
+        candidates = [neighbor for neighbor in neighbors
+                      if neighbor is not self and not neighbor.reached_goal]
+        if not candidates:
+            return []
+        offsets = np.array([neighbor.position for neighbor in candidates]) - self.position
+        distances = np.sqrt(np.einsum('ij,ij->i', offsets, offsets))
+        return [neighbor for neighbor, distance in zip(candidates, distances)
+                if distance < self.perception_radius]
     
     def separate(self, neighbors: List['Pedestrian']) -> np.ndarray:
         """Правило разделения - избегание столкновений"""
@@ -285,8 +442,10 @@ class Pedestrian:
         steer = desired - self.velocity
         return steer
     
-    def avoid_walls(self, walls: List[Wall]) -> np.ndarray:
+    def avoid_walls(self, walls: Union[List[Wall], WallSet]) -> np.ndarray:
         """Избегание стен"""
+        if isinstance(walls, WallSet):
+            walls = walls.near(self.position, self.perception_radius)
         avoidance = np.array([0.0, 0.0])
         
         for wall in walls:
@@ -313,6 +472,233 @@ class Pedestrian:
                            (int(self.position[0]), int(self.position[1])),
                            (int(end_pos[0]), int(end_pos[1])), 2)
 
+class SpatialHashGrid:
+    """
+    Пространственный хеш пешеходов по квадратным клеткам
+    
+    Сторона клетки не меньше радиуса восприятия, поэтому все соседи в
+    радиусе восприятия лежат в клетке пешехода или в восьми соседних.
+    Сетка перестраивается один раз за кадр.
+    """
+    
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], List[Pedestrian]] = {}
+    
+    def _cell(self, position: np.ndarray) -> Tuple[int, int]:
+        return int(position[0] // self.cell_size), int(position[1] // self.cell_size)
+    
+    def rebuild(self, pedestrians: List[Pedestrian]):
+        """Раскладка ещё не дошедших до выхода пешеходов по клеткам"""
+        self.cells = {}
+        for pedestrian in pedestrians:
+            if not pedestrian.reached_goal:
+                self.cells.setdefault(self._cell(pedestrian.position), []).append(pedestrian)
+    
+    def nearby(self, position: np.ndarray) -> List[Pedestrian]:
+        """Пешеходы из клетки точки и восьми соседних (кандидаты в соседи)"""
+        cell_x, cell_y = self._cell(position)
+        candidates = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                candidates.extend(self.cells.get((cell_x + dx, cell_y + dy), ()))
+        return candidates
+
+class CrowdArrays:
+    """
+    Векторизованный движок толпы (структура массивов)
+
+    Положения и скорости всех пешеходов хранятся массивами (N, 2), параметры
+    движения и веса сил - векторами длины N. Силы Boids, движение к цели и
+    отталкивание от стен считаются для всех пешеходов сразу. Правила те же,
+    что в Pedestrian, но все пешеходы обновляются по состоянию начала кадра
+    (в объектной модели - по очереди), поэтому траектории совпадают с
+    объектной моделью с точностью до порядка обновления внутри кадра.
+    """
+
+    def __init__(self, pedestrians: List[Pedestrian], walls: WallSet, exits: List[Exit]):
+        self.walls = walls
+        self.exits = exits
+        self.position = np.array([p.position for p in pedestrians], dtype=float).reshape(-1, 2)
+        self.velocity = np.array([p.velocity for p in pedestrians], dtype=float).reshape(-1, 2)
+        self.reached_goal = np.array([p.reached_goal for p in pedestrians], dtype=bool)
+
+        # Параметры движения и веса сил каждого пешехода
+        self.max_speed = self._column(pedestrians, 'max_speed')
+        self.max_force = self._column(pedestrians, 'max_force')
+        self.radius = self._column(pedestrians, 'radius')
+        self.perception_radius = self._column(pedestrians, 'perception_radius')
+        self.separation_weight = self._column(pedestrians, 'separation_weight')
+        self.alignment_weight = self._column(pedestrians, 'alignment_weight')
+        self.cohesion_weight = self._column(pedestrians, 'cohesion_weight')
+        self.goal_weight = self._column(pedestrians, 'goal_weight')
+        self.wall_avoidance_weight = self._column(pedestrians, 'wall_avoidance_weight')
+
+        # Цели: индекс выхода у каждого пешехода
+        exit_index = {id(exit): i for i, exit in enumerate(exits)}
+        self.goal = np.array([exit_index[id(p.goal)] for p in pedestrians], dtype=np.int64)
+        self.exit_position = np.array([exit.position for exit in exits], dtype=float).reshape(-1, 2)
+        self.exit_width = np.array([exit.width for exit in exits], dtype=float)
+
+        # Клетка сетки соседей: не меньше наибольшего радиуса восприятия
+        self.cell_size = float(self.perception_radius.max()) if len(pedestrians) else 40.0
+
+    @staticmethod
+    def _column(pedestrians: List[Pedestrian], name: str) -> np.ndarray:
+        return np.array([getattr(p, name) for p in pedestrians], dtype=float)
+
+    @staticmethod
+    def _norm(vectors: np.ndarray) -> np.ndarray:
+        return np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+
+    def _limit(self, vectors: np.ndarray, limit: np.ndarray) -> np.ndarray:
+        """Ограничение длины векторов (как в Pedestrian.update)"""
+        length = self._norm(vectors)
+        over = length > limit
+        vectors[over] = vectors[over] / length[over, None] * limit[over, None]
+        return vectors
+
+    def _seek(self, target: np.ndarray, position: np.ndarray, velocity: np.ndarray,
+              max_speed: np.ndarray) -> np.ndarray:
+        """Pedestrian.seek для всех пешеходов"""
+        desired = target - position
+        distance = self._norm(desired)
+        steer = np.zeros_like(desired)
+        moving = distance > 0
+        steer[moving] = (desired[moving] / distance[moving, None] * max_speed[moving, None]
+                         - velocity[moving])
+        return steer
+
+    def _neighbor_pairs(self, position: np.ndarray, perception_radius: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Пары (i, j) соседей в радиусе восприятия i через сетку клеток
+
+        Returns:
+            индексы i, индексы j и смещения position[i] - position[j]
+        """
+        n = len(position)
+        cells = np.floor(position / self.cell_size).astype(np.int64)
+        # Сдвиг с пустым полем в одну клетку, чтобы соседние ключи не переходили через край строки
+        cells -= cells.min(axis=0) - 1
+        width = int(cells[:, 0].max()) + 2
+        keys = cells[:, 1] * width + cells[:, 0]
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        pairs_i, pairs_j = [], []
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                target = keys + dy * width + dx
+                lo = np.searchsorted(sorted_keys, target, side='left')
+                counts = np.searchsorted(sorted_keys, target, side='right') - lo
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+                pairs_i.append(np.repeat(np.arange(n), counts))
+                pairs_j.append(order[starts + np.arange(total)])
+
+        if not pairs_i:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty((0, 2))
+        i = np.concatenate(pairs_i)
+        j = np.concatenate(pairs_j)
+        diff = position[i] - position[j]
+        keep = (i != j) & (np.einsum('ij,ij->i', diff, diff) < perception_radius[i] ** 2)
+        return i[keep], j[keep], diff[keep]
+
+    def _boids_forces(self, position: np.ndarray, velocity: np.ndarray, max_speed: np.ndarray,
+                      radius: np.ndarray, perception_radius: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Разделение, выравнивание и сплочение для всех пешеходов"""
+        n = len(position)
+        i, j, diff = self._neighbor_pairs(position, perception_radius)
+
+        def pair_sum(values: np.ndarray, index: np.ndarray) -> np.ndarray:
+            # bincount без пар возвращает целые - приводим к float
+            return np.stack([np.bincount(index, weights=values[:, 0], minlength=n),
+                             np.bincount(index, weights=values[:, 1], minlength=n)], axis=1).astype(float)
+
+        neighbor_count = np.bincount(i, minlength=n).astype(float)
+        has_neighbors = neighbor_count > 0
+
+        # Разделение: соседи ближе трёх радиусов, вес обратно пропорционален расстоянию
+        distance = self._norm(diff)
+        close = (distance > 0) & (distance < radius[i] * 3)
+        close_i = i[close]
+        separation_count = np.bincount(close_i, minlength=n).astype(float)
+        steer = pair_sum(diff[close] / distance[close, None] / distance[close, None], close_i)
+        separating = separation_count > 0
+        steer[separating] /= separation_count[separating, None]
+        steer_length = self._norm(steer)
+        scaled = separating & (steer_length > 0)
+        steer[scaled] = (steer[scaled] / steer_length[scaled, None] * max_speed[scaled, None]
+                         - velocity[scaled])
+        separation = steer
+
+        # Выравнивание: средняя скорость соседей, доведённая до максимальной
+        alignment = np.zeros((n, 2))
+        average_velocity = pair_sum(velocity[j], i)[has_neighbors] / neighbor_count[has_neighbors, None]
+        average_length = self._norm(average_velocity)
+        moving = average_length > 0
+        average_velocity[moving] *= (max_speed[has_neighbors][moving] / average_length[moving])[:, None]
+        alignment[has_neighbors] = average_velocity - velocity[has_neighbors]
+
+        # Сплочение: движение к центру соседей
+        cohesion = np.zeros((n, 2))
+        center = pair_sum(position[j], i)[has_neighbors] / neighbor_count[has_neighbors, None]
+        cohesion[has_neighbors] = self._seek(center, position[has_neighbors],
+                                             velocity[has_neighbors], max_speed[has_neighbors])
+        return separation, alignment, cohesion
+
+    def step(self, dt: float):
+        """Один шаг модели для всех ещё не дошедших пешеходов"""
+        active = np.flatnonzero(~self.reached_goal)
+        if len(active) == 0:
+            return
+        position = self.position[active]
+        velocity = self.velocity[active]
+        max_speed = self.max_speed[active]
+        radius = self.radius[active]
+        perception_radius = self.perception_radius[active]
+        goal = self.goal[active]
+
+        separation, alignment, cohesion = self._boids_forces(
+            position, velocity, max_speed, radius, perception_radius)
+        goal_seeking = self._seek(self.exit_position[goal], position, velocity, max_speed)
+        wall_avoidance = self.walls.repulsion(position, perception_radius)
+
+        total_force = (separation * self.separation_weight[active, None]
+                       + alignment * self.alignment_weight[active, None]
+                       + cohesion * self.cohesion_weight[active, None]
+                       + goal_seeking * self.goal_weight[active, None]
+                       + wall_avoidance * self.wall_avoidance_weight[active, None])
+        total_force = self._limit(total_force, self.max_force[active])
+
+        velocity = self._limit(velocity + total_force * dt, max_speed)
+        position = position + velocity * dt
+        self.walls.resolve_collisions(position, velocity, radius)
+
+        # Границы экрана
+        position[:, 0] = np.clip(position[:, 0], radius, SCREEN_WIDTH - radius)
+        position[:, 1] = np.clip(position[:, 1], radius, SCREEN_HEIGHT - radius)
+
+        # Достижение цели
+        reached = self._norm(position - self.exit_position[goal]) < self.exit_width[goal]
+        for exit, count in zip(self.exits, np.bincount(goal[reached], minlength=len(self.exits))):
+            exit.reached_count += int(count)
+
+        self.position[active] = position
+        self.velocity[active] = velocity
+        self.reached_goal[active] = reached
+
+    def sync_to(self, pedestrians: List[Pedestrian]):
+        """Перенос положений и скоростей в объекты Pedestrian (для отрисовки)"""
+        for pedestrian, position, velocity, reached in zip(
+                pedestrians, self.position, self.velocity, self.reached_goal):
+            pedestrian.position = position
+            pedestrian.velocity = velocity
+            pedestrian.reached_goal = bool(reached)
+
 class Environment:
     """Класс среды с коридорами и препятствиями"""
     
@@ -320,6 +706,7 @@ class Environment:
         self.walls = []
         self.exits = []
         self.create_environment()
+        self.wall_set = WallSet(self.walls)
     
     def create_environment(self):
         """Создание среды с коридорами и выходами"""
@@ -370,22 +757,49 @@ class Environment:
 class Simulation:
     """Основной класс симуляции"""
     
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Симуляция движения пешеходов (Boids + Goal Seeking)")
-        self.clock = pygame.time.Clock()
+    # 'objects' - пешеходы обновляются по одному, 'vectorized' - CrowdArrays
+    ENGINES = ('objects', 'vectorized')
+    
+    def __init__(self, engine: str = 'objects', headless: bool = False,
+                 pedestrian_count: int = 60, density_multiplier: float = 1.0,
+                 seed: Optional[int] = None):
+        """
+        Args:
+            engine: движок обновления ('objects' или 'vectorized')
+            headless: без окна, шрифтов и часов pygame - только модель (run_headless)
+            pedestrian_count: базовое число пешеходов
+            density_multiplier: множитель плотности
+            seed: семя random для воспроизводимых экспериментов
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Неизвестный движок: {engine}. Доступны: {self.ENGINES}")
+        self.engine = engine
+        self.headless = headless
+        if seed is not None:
+            random.seed(seed)
+        
+        if not headless:
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Симуляция движения пешеходов (Boids + Goal Seeking)")
+            self.clock = pygame.time.Clock()
+            self.font = pygame.font.Font(None, 24)
         
         self.environment = Environment()
         self.pedestrians = []
-        self.font = pygame.font.Font(None, 24)
+        self.crowd: Optional[CrowdArrays] = None
         
         # Параметры эксперимента
-        self.pedestrian_count = 60  # уменьшаем количество для меньшего окна
-        self.density_multiplier = 1.0
+        self.pedestrian_count = pedestrian_count  # уменьшаем количество для меньшего окна
+        self.density_multiplier = density_multiplier
         self.paused = False  # Добавляем флаг паузы
         
         self.create_pedestrians()
         
+        # Сетка для поиска соседей: клетка не меньше радиуса восприятия
+        # (с запасом на смещение соседей, уже обновлённых в этом кадре);
+        # сторона пересчитывается под шаг dt в _rebuild_neighbor_grid
+        self.neighbor_grid = SpatialHashGrid(self._perception_cell_size(1.0 / FPS))
+        
         # Статистика
         self.total_created = 0
         self.start_time = pygame.time.get_ticks()
@@ -407,12 +821,56 @@ class Simulation:
             self.pedestrians.append(pedestrian)
         
         self.total_created = len(self.pedestrians)
+        # Наибольшие параметры пешеходов - для стороны клетки сетки соседей
+        self._max_perception = max((p.perception_radius for p in self.pedestrians), default=40)
+        self._max_speed = max((p.max_speed for p in self.pedestrians), default=50)
+        self._max_radius = max((p.radius for p in self.pedestrians), default=8)
+        self._build_crowd()
+    
+    def _build_crowd(self):
+        """Массивы векторизованного движка по текущим пешеходам"""
+        if self.engine == 'vectorized':
+            self.crowd = CrowdArrays(self.pedestrians, self.environment.wall_set, self.environment.exits)
+        else:
+            self.crowd = None
     
-    def update(self, dt: float):
-        """Обновление симуляции"""
-        if not self.paused:  # Обновляем только если не на паузе
+    def _perception_cell_size(self, dt: float) -> float:
+        """
+        Сторона клетки сетки соседей для шага dt
+        
+        Уже обновлённый в этом кадре сосед сдвигается от своей клетки не
+        дальше max_speed * dt плюс выталкивание из стен (до двух стен в
+        углу, каждое не больше радиуса пешехода).
+        """
+        return self._max_perception + self._max_speed * dt + 2 * self._max_radius
+    
+    def _rebuild_neighbor_grid(self, dt: float):
+        """Раскладка пешеходов по сетке со стороной клетки под шаг dt"""
+        cell_size = self._perception_cell_size(dt)
+        if self.neighbor_grid.cell_size != cell_size:
+            self.neighbor_grid = SpatialHashGrid(cell_size)
+        self.neighbor_grid.rebuild(self.pedestrians)
+    
+    def update(self, dt: float, sync: bool = True):
+        """
+        Обновление симуляции
+        
+        sync: переносить ли состояние движка 'vectorized' в объекты
+              Pedestrian (нужно для отрисовки; run_headless делает это
+              один раз в конце)
+        """
+        if self.paused:  # Обновляем только если не на паузе
+            return
+        if self.crowd is not None:
+            self.crowd.step(dt)
+            if sync:
+                self.crowd.sync_to(self.pedestrians)
+        else:
+            # Соседи ищутся по сетке, а не перебором всех пешеходов
+            self._rebuild_neighbor_grid(dt)
             for pedestrian in self.pedestrians:
-                pedestrian.update(self.pedestrians, self.environment.walls, dt)
+                neighbors = self.neighbor_grid.nearby(pedestrian.position)
+                pedestrian.update(neighbors, self.environment.wall_set, dt)
     
     def draw_statistics(self):
         """Отрисовка статистики"""
@@ -428,11 +886,13 @@ class Simulation:
             f"Плотность: {self.density_multiplier:.1f}x",
             f"Время: {elapsed_time:.1f}с",
             f"Пауза: {'ВКЛ' if self.paused else 'ВЫКЛ'}",
+            f"Движок: {self.engine}",
             "",
             "Управление:",
             "R - перезапуск",
             "1,2,3 - изменить плотность",
-            "Пробел - пауза/продолжить"
+            "Пробел - пауза/продолжить",
+            "V - сменить движок"
         ]
         
         y_offset = 10
@@ -442,21 +902,79 @@ class Simulation:
                 self.screen.blit(text, (10, y_offset))
             y_offset += 25
     
-    def draw_density_visualization(self):
-        """Визуализация плотности скопления"""
-        # Создаем сетку для подсчета плотности
-        grid_size = 40
+    def active_positions(self) -> np.ndarray:
+        """Положения ещё не дошедших до выхода пешеходов, массив (N, 2)"""
+        if self.crowd is not None:
+            return self.crowd.position[~self.crowd.reached_goal]
+        return np.array([p.position for p in self.pedestrians if not p.reached_goal],
+                        dtype=float).reshape(-1, 2)
+    
+    def density_grid(self, grid_size: int = 40) -> np.ndarray:
+        """Число пешеходов в каждой клетке grid_size x grid_size (строки - y)"""
         grid_width = SCREEN_WIDTH // grid_size
         grid_height = SCREEN_HEIGHT // grid_size
-        density_grid = [[0 for _ in range(grid_width)] for _ in range(grid_height)]
+        cells = (self.active_positions() // grid_size).astype(np.int64)
+        inside = ((cells[:, 0] >= 0) & (cells[:, 0] < grid_width)
+                  & (cells[:, 1] >= 0) & (cells[:, 1] < grid_height))
+        counts = np.bincount(cells[inside, 1] * grid_width + cells[inside, 0],
+                             minlength=grid_width * grid_height)
+        return counts.reshape(grid_height, grid_width)
+    
+    def run_headless(self, dt: float = 1.0 / FPS, time_limit: float = 300.0,
+                     percentiles: Tuple[float, ...] = (50, 90, 99)) -> Dict:
+        """
+        Прогон модели без отрисовки с фиксированным шагом dt, как можно быстрее
+        
+        Останавливается, когда все пешеходы дошли до выходов или модельное
+        время достигло time_limit.
+        
+        Returns:
+            словарь метрик: время эвакуации (None, если не все вышли за
+            time_limit), reached_count по выходам и перцентили плотности -
+            числа пешеходов в занятых клетках 40x40 по всем шагам
+        """
+        # Число шагов, а не накопленная сумма dt - без дрейфа округления
+        max_steps = math.ceil(time_limit / dt - 1e-9)
+        steps = 0
+        densities = []
+        start_time = time.perf_counter()
         
+        while steps < max_steps and len(self.active_positions()) > 0:
+            self.update(dt, sync=False)
+            steps += 1
+            grid = self.density_grid()
+            densities.append(grid[grid > 0])
+        if self.crowd is not None:
+            self.crowd.sync_to(self.pedestrians)
+        
+        simulated_time = steps * dt
+        densities = np.concatenate(densities) if densities else np.empty(0)
+        remaining = len(self.active_positions())
+        return {
+            'engine': self.engine,
+            'pedestrians': len(self.pedestrians),
+            'dt': dt,
+            'steps': steps,
+            'simulated_time': simulated_time,
+            'wall_time': time.perf_counter() - start_time,
+            'evacuation_time': simulated_time if remaining == 0 else None,
+            'remaining': remaining,
+            'reached_count': [exit.reached_count for exit in self.environment.exits],
+            'exits': [exit.position.tolist() for exit in self.environment.exits],
+            'density_percentiles': {
+                str(q): float(np.percentile(densities, q)) if densities.size else 0.0
+                for q in percentiles
+            },
+            'max_density': int(densities.max()) if densities.size else 0,
+        }
+    
+    def draw_density_visualization(self):
+        """Визуализация плотности скопления"""
         # Подсчитываем пешеходов в каждой клетке
-        for pedestrian in self.pedestrians:
-            if not pedestrian.reached_goal:
-                grid_x = int(pedestrian.position[0] // grid_size)
-                grid_y = int(pedestrian.position[1] // grid_size)
-                if 0 <= grid_x < grid_width and 0 <= grid_y < grid_height:
-                    density_grid[grid_y][grid_x] += 1
+        grid_size = 40
+        counts = self.density_grid(grid_size)
+        grid_height, grid_width = counts.shape
+        density_grid = counts.tolist()
         
         # Отрисовываем области высокой плотности
         for y in range(grid_height):
@@ -496,6 +1014,12 @@ class Simulation:
                     self.density_multiplier = 2.0
                     self.create_pedestrians()
                 
+                elif event.key == pygame.K_v:
+                    # Переключение движка с сохранением текущего состояния
+                    index = self.ENGINES.index(self.engine)
+                    self.engine = self.ENGINES[(index + 1) % len(self.ENGINES)]
+                    self._build_crowd()
+                
                 elif event.key == pygame.K_SPACE:
                     # Переключаем паузу
                     self.paused = not self.paused
@@ -548,6 +1072,84 @@ class Simulation:
         
         pygame.quit()
 
+def check_neighbor_grid(dt: float = 0.5, pedestrian_count: int = 300, steps: int = 40,
+                        seed: int = 0) -> bool:
+    """
+    Сверка соседей из сетки с полным перебором (движок 'objects')
+    
+    Пешеходы обновляются по очереди с крупным шагом dt; перед каждым
+    обновлением соседи в радиусе восприятия, найденные по 3x3 клеткам
+    сетки, должны совпасть с найденными среди всех пешеходов.
+    """
+    simulation = Simulation('objects', headless=True, pedestrian_count=pedestrian_count, seed=seed)
+    walls = simulation.environment.wall_set
+    for _ in range(steps):
+        simulation._rebuild_neighbor_grid(dt)
+        for pedestrian in simulation.pedestrians:
+            if pedestrian.reached_goal:
+                continue
+            candidates = simulation.neighbor_grid.nearby(pedestrian.position)
+            from_grid = pedestrian.get_nearby_neighbors(candidates)
+            brute_force = pedestrian.get_nearby_neighbors(simulation.pedestrians)
+            if set(map(id, from_grid)) != set(map(id, brute_force)):
+                return False
+            pedestrian.update(brute_force, walls, dt)
+    return True
+
+def check_headless_density(time_limit: float = 10.0, pedestrian_count: int = 60,
+                           seed: int = 1) -> bool:
+    """
+    Проверка метрик run_headless для обоих движков: если к концу прогона
+    остались пешеходы, плотность в занятых клетках должна быть ненулевой
+    """
+    for engine in Simulation.ENGINES:
+        simulation = Simulation(engine, headless=True, pedestrian_count=pedestrian_count, seed=seed)
+        metrics = simulation.run_headless(time_limit=time_limit)
+        if metrics['remaining'] == 0:
+            continue
+        if metrics['max_density'] == 0 or min(metrics['density_percentiles'].values()) == 0:
+            return False
+    return True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Симуляция движения пешеходов")
+    parser.add_argument('--engine', default='objects', choices=Simulation.ENGINES)
+    parser.add_argument('--headless', action='store_true',
+                        help="без окна: фиксированный шаг и метрики эвакуации в JSON")
+    parser.add_argument('--count', type=int, default=60, help="число пешеходов")
+    parser.add_argument('--dt', type=float, default=1.0 / FPS, help="шаг модели в секундах")
+    parser.add_argument('--time-limit', type=float, default=300.0, help="предел модельного времени")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--check-grid', action='store_true',
+                        help="сверить сетку соседей с полным перебором при шаге --dt")
+    parser.add_argument('--check-density', action='store_true',
+                        help="проверить ненулевую плотность в метриках run_headless (оба движка)")
+    parser.add_argument('--output', help="файл JSON (по умолчанию - вывод в консоль)")
+    args = parser.parse_args(argv)
+
+    if args.check_density:
+        correct = check_headless_density(seed=args.seed or 1)
+        print(f"Плотность в run_headless: {'в порядке' if correct else 'ОШИБКА - нулевая'}")
+        return
+
+    if args.check_grid:
+        matches = check_neighbor_grid(args.dt, args.count, seed=args.seed or 0)
+        print(f"Сетка соседей при dt={args.dt}: {'совпадает' if matches else 'НЕ совпадает'} с полным перебором")
+        return
+
+    simulation = Simulation(args.engine, headless=args.headless,
+                            pedestrian_count=args.count, seed=args.seed)
+    if not args.headless:
+        simulation.run()
+        return
+
+    metrics = simulation.run_headless(args.dt, args.time_limit)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(metrics, f, indent=2, ensure_ascii=False)
+        print(f"Результаты сохранены в файл: {args.output}")
+    else:
+        print(json.dumps(metrics, indent=2, ensure_ascii=False))
+
 if __name__ == "__main__":
-    simulation = Simulation()
-    simulation.run()
\ No newline at end of file
+    main()
\ No newline at end of file
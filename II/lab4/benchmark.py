@@ -0,0 +1,212 @@
+"""
+Замеры производительности движков игры Жизнь
+
+Для каждого сочетания (движок, размер, плотность) сетка создается с
+фиксированным семенем, затем замеряются поколения/с, клетки/с и пиковая
+память процесса (RSS). Каждый замер выполняется в отдельном процессе,
+чтобы пиковая память относилась только к нему. Результаты движков
+сверяются с эталонным поклеточным update_grid и сохраняются в JSON.
+
+Пример:
+    python benchmark.py --sizes 32 256 2048 --engines vectorized bitpacked --output bench.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from life import GameOfLife
+
+try:
+    import resource
+except ImportError:  # Windows: пиковая память не измеряется
+    resource = None
+
+# Размеры сеток по умолчанию: от 32x32 до 8192x8192
+DEFAULT_SIZES = [32, 128, 512, 2048, 8192]
+DEFAULT_DENSITIES = [0.1, 0.3, 0.5]
+DEFAULT_ENGINES = ['reference', 'vectorized', 'bitpacked', 'sparse', 'hashlife', 'parallel']
+# Ограничения размера для медленных на больших случайных сетках движков
+ENGINE_MAX_CELLS = {
+    'reference': 128 * 128,
+    'hashlife': 256 * 256,
+}
+# Размер сетки и число поколений для сверки с эталоном
+CHECK_SIZE = 48
+CHECK_GENERATIONS = 12
+
+
+def peak_rss_mb():
+    """Пиковая память текущего процесса в МБ (None, если недоступно)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux возвращает КБ, macOS - байты
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_game(engine, size, density, seed):
+    """Игра с фиксированным семенем, без печати и без глобального генератора"""
+    return GameOfLife(size, size, density, seed=seed, engine=engine,
+                      rng=np.random.default_rng(seed), verbose=False)
+
+
+def check_against_reference(engine, density, seed):
+    """Совпадают ли поколения движка с эталонным update_grid"""
+    reference = make_game('reference', CHECK_SIZE, density, seed)
+    game = make_game(engine, CHECK_SIZE, density, seed)
+    try:
+        for _ in range(CHECK_GENERATIONS):
+            reference.update_grid()
+            game.update_grid()
+            if not np.array_equal(np.asarray(game.grid), reference.grid):
+                return False
+        # Перемотка (для hashlife и parallel - отдельный путь)
+        reference.advance(CHECK_GENERATIONS)
+        game.advance(CHECK_GENERATIONS)
+        return bool(np.array_equal(np.asarray(game.grid), reference.grid))
+    finally:
+        game.close()
+
+
+def _measure(engine, size, density, seed, generations, queue):
+    """Замер одного случая (выполняется в отдельном процессе)"""
+    game = make_game(engine, size, density, seed)
+    try:
+        game.advance(1)  # прогрев: первые выделения памяти, запуск процессов
+        start_time = time.perf_counter()
+        game.advance(generations)
+        elapsed = time.perf_counter() - start_time
+        alive_cells = int(game.get_stats()['alive_cells'])
+    finally:
+        game.close()
+
+    queue.put({
+        'seconds': elapsed,
+        'generations_per_sec': generations / elapsed,
+        'cells_per_sec': generations * size * size / elapsed,
+        'peak_rss_mb': peak_rss_mb(),
+        'final_alive_cells': alive_cells,
+    })
+
+
+def run_case(engine, size, density, seed, generations, context):
+    """Замер в отдельном процессе; None, если процесс завершился с ошибкой"""
+    queue = context.Queue()
+    process = context.Process(target=_measure,
+                              args=(engine, size, density, seed, generations, queue))
+    process.start()
+    process.join()
+    return queue.get() if process.exitcode == 0 else None
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, densities=DEFAULT_DENSITIES, engines=DEFAULT_ENGINES,
+                   generations=16, seed=2024, check=True):
+    """
+    Запуск всех замеров
+
+    Returns:
+        словарь с описанием окружения ('meta') и списком результатов ('results')
+    """
+    context = multiprocessing.get_context('spawn')
+    results = []
+    correctness = {}
+
+    if check:
+        for engine in engines:
+            for density in densities:
+                correctness[(engine, density)] = check_against_reference(engine, density, seed)
+
+    for size in sizes:
+        for density in densities:
+            for engine in engines:
+                row = {
+                    'engine': engine,
+                    'size': size,
+                    'density': density,
+                    'generations': generations,
+                    'matches_reference': correctness.get((engine, density)),
+                }
+                if size * size > ENGINE_MAX_CELLS.get(engine, float('inf')):
+                    row['skipped'] = 'размер больше ENGINE_MAX_CELLS'
+                else:
+                    measured = run_case(engine, size, density, seed, generations, context)
+                    if measured is None:
+                        row['skipped'] = 'ошибка процесса замера'
+                    else:
+                        row.update(measured)
+                results.append(row)
+                print_row(row)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def print_row(row):
+    """Строка таблицы результатов"""
+    prefix = f"{row['engine']:<12} {row['size']:>5}x{row['size']:<5} p={row['density']:<4}"
+    if 'skipped' in row:
+        print(f"{prefix} пропущено: {row['skipped']}")
+        return
+    check = {True: '✓', False: '✗', None: '-'}[row['matches_reference']]
+    rss = f"{row['peak_rss_mb']:9.1f} МБ" if row['peak_rss_mb'] is not None else '        -'
+    print(f"{prefix} {row['generations_per_sec']:10.2f} пок/с "
+          f"{row['cells_per_sec']:14.3e} кл/с {rss}  эталон: {check}")
+
+
+def print_comparison(report):
+    """Сравнительная таблица: поколения/с по движкам для каждого размера и плотности"""
+    engines = list(dict.fromkeys(row['engine'] for row in report['results']))
+    print("\n" + "=" * (24 + 14 * len(engines)))
+    print(f"{'Размер':<12} {'Плотность':<10}" + ''.join(f"{engine:>14}" for engine in engines))
+    print("-" * (24 + 14 * len(engines)))
+
+    table = {}
+    for row in report['results']:
+        table[(row['size'], row['density'], row['engine'])] = row.get('generations_per_sec')
+    for size, density in dict.fromkeys((row['size'], row['density']) for row in report['results']):
+        cells = ''.join(f"{table[(size, density, engine)]:>14.2f}" if table.get((size, density, engine))
+                        else f"{'-':>14}" for engine in engines)
+        print(f"{f'{size}x{size}':<12} {density:<10}{cells}")
+    print("=" * (24 + 14 * len(engines)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности игры Жизнь")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--densities', type=float, nargs='+', default=DEFAULT_DENSITIES)
+    parser.add_argument('--engines', nargs='+', default=DEFAULT_ENGINES, choices=GameOfLife.ENGINES)
+    parser.add_argument('--generations', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--no-check', action='store_true', help="не сверять с эталоном")
+    parser.add_argument('--output', help="файл JSON (по умолчанию - вывод в консоль)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.densities, args.engines,
+                            args.generations, args.seed, check=not args.no_check)
+    print_comparison(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Результаты сохранены в файл: {args.output}")
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
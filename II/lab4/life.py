@@ -2,10 +2,1161 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 from matplotlib.colors import ListedColormap
+from collections import OrderedDict, deque
+from multiprocessing import connection, shared_memory
+import hashlib
+import multiprocessing
+import os
 import random
+import re
+import struct
+import time
+import weakref
+
+
+# Смещения соседей (строка, столбец) для поддерживаемых окрестностей
+NEIGHBORHOODS = {
+    'moore': [(dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc],
+    'von_neumann': [(-1, 0), (0, -1), (0, 1), (1, 0)],
+}
+# Границы: 'toroidal' - перенос на противоположный край, 'bounded' - снаружи мертвые клетки
+BOUNDARIES = ('toroidal', 'bounded')
+
+
+def count_neighbors_grid(grid, neighborhood='moore', boundary='toroidal'):
+    """
+    Подсчет живых соседей сразу для всей сетки
+    
+    Сетка дополняется по краям одной клеткой (с переносом для тора или
+    нулями для ограниченного поля), после чего суммируются сдвинутые срезы.
+    Сеткой считаются две последние оси, поэтому массив (B, H, W)
+    обрабатывается как B независимых сеток.
+    """
+    height, width = grid.shape[-2:]
+    pad_width = [(0, 0)] * (grid.ndim - 2) + [(1, 1), (1, 1)]
+    mode = 'wrap' if boundary == 'toroidal' else 'constant'
+    padded = np.pad(grid.astype(np.uint8, copy=False), pad_width, mode=mode)
+    counts = np.zeros(grid.shape, dtype=np.uint8)
+    for dr, dc in NEIGHBORHOODS[neighborhood]:
+        counts += padded[..., 1 + dr:1 + dr + height, 1 + dc:1 + dc + width]
+    return counts
+
+
+def count_neighbors_toroidal(grid):
+    """
+    Подсчет живых соседей (окрестность Мура, тороидальные границы)
+    
+    Результат совпадает с поклеточным count_neighbors, но без цикла
+    Python по клеткам.
+    """
+    return count_neighbors_grid(grid)
+
+
+def conway_step(grid, dtype=int):
+    """Одно поколение по правилам Конвея для всей сетки (векторизованно)"""
+    neighbors = count_neighbors_toroidal(grid)
+    # Рождение при 3 соседях, выживание живой клетки при 2 или 3
+    new_grid = (neighbors == 3) | ((grid == 1) & (neighbors == 2))
+    return new_grid.astype(dtype)
+
+
+class LifeRule:
+    """
+    Правило Life-подобного автомата в нотации B/S (например, 'B3/S23')
+    
+    Правило компилируется в таблицу переходов 2x9: table[состояние, соседи]
+    дает следующее состояние клетки, и векторизованный шаг сводится к
+    подсчету соседей и одной выборке из таблицы.
+    """
+    # Известные варианты правил
+    PRESETS = {
+        'conway': 'B3/S23',
+        'highlife': 'B36/S23',
+        'seeds': 'B2/S',
+        'daynight': 'B3678/S34678',
+    }
+    
+    def __init__(self, rulestring='B3/S23', neighborhood='moore', boundary='toroidal'):
+        """
+        Args:
+            rulestring: 'B3/S23', 'S23/B3', '23/3' (старая нотация S/B)
+                        или имя из PRESETS
+            neighborhood: 'moore' (8 соседей) или 'von_neumann' (4 соседа)
+            boundary: 'toroidal' или 'bounded'
+        """
+        if neighborhood not in NEIGHBORHOODS:
+            raise ValueError(f"Неизвестная окрестность: {neighborhood}")
+        if boundary not in BOUNDARIES:
+            raise ValueError(f"Неизвестный тип границ: {boundary}")
+        
+        rulestring = self.PRESETS.get(rulestring.lower(), rulestring)
+        self.births, self.survivals = self.parse(rulestring)
+        self.neighborhood = neighborhood
+        self.boundary = boundary
+        
+        max_neighbors = len(NEIGHBORHOODS[neighborhood])
+        if max(self.births | self.survivals, default=0) > max_neighbors:
+            raise ValueError(f"Правило {rulestring} требует больше {max_neighbors} соседей")
+        
+        self.table = np.zeros((2, 9), dtype=np.uint8)
+        self.table[0, sorted(self.births)] = 1
+        self.table[1, sorted(self.survivals)] = 1
+        self._flat_table = self.table.ravel()
+    
+    @staticmethod
+    def parse(rulestring):
+        """Разбор строки правила; возвращает (рождение, выживание) как множества"""
+        text = rulestring.replace(' ', '').upper()
+        match = re.fullmatch(r'B([0-8]*)/S([0-8]*)', text)
+        if match:
+            births, survivals = match.groups()
+        else:
+            match = re.fullmatch(r'S([0-8]*)/B([0-8]*)', text) or re.fullmatch(r'([0-8]*)/([0-8]*)', text)
+            if not match:
+                raise ValueError(f"Неверная строка правила: {rulestring}")
+            survivals, births = match.groups()
+        return {int(c) for c in births}, {int(c) for c in survivals}
+    
+    @property
+    def rulestring(self):
+        births = ''.join(str(n) for n in sorted(self.births))
+        survivals = ''.join(str(n) for n in sorted(self.survivals))
+        return f"B{births}/S{survivals}"
+    
+    def rle_rule(self, width, height):
+        """
+        Правило для заголовка RLE в нотации Golly: суффикс V - окрестность
+        фон Неймана, ':P<ширина>,<высота>' - ограниченная сетка (тор по умолчанию)
+        """
+        text = self.rulestring
+        if self.neighborhood == 'von_neumann':
+            text += 'V'
+        if self.boundary == 'bounded':
+            text += f":P{width},{height}"
+        return text
+    
+    @classmethod
+    def from_rle(cls, text):
+        """Разбор правила из заголовка RLE (обратно к rle_rule)"""
+        rulestring, _, topology = text.partition(':')
+        boundary = 'toroidal'
+        if topology:
+            if topology[0].upper() == 'P':
+                boundary = 'bounded'
+            elif topology[0].upper() != 'T':
+                raise ValueError(f"Неподдерживаемая топология сетки в RLE: {text}")
+        neighborhood = 'moore'
+        if rulestring[-1:].upper() == 'V':
+            neighborhood = 'von_neumann'
+            rulestring = rulestring[:-1]
+        return cls(rulestring, neighborhood, boundary)
+    
+    @property
+    def is_conway(self):
+        """Классическая игра Конвея на торе с окрестностью Мура"""
+        return (self.births == {3} and self.survivals == {2, 3}
+                and self.neighborhood == 'moore' and self.boundary == 'toroidal')
+    
+    def step(self, grid, dtype=int):
+        """Одно поколение для сетки или пакета сеток (B, H, W)"""
+        neighbors = count_neighbors_grid(grid, self.neighborhood, self.boundary)
+        index = grid.astype(np.uint8, copy=False) * np.uint8(9) + neighbors
+        return np.take(self._flat_table, index).astype(dtype, copy=False)
+    
+    def __repr__(self):
+        return f"LifeRule('{self.rulestring}', '{self.neighborhood}', '{self.boundary}')"
+
+
+def _popcount_words(words):
+    """Количество единичных битов в массиве слов uint64"""
+    if hasattr(np, 'bitwise_count'):
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+    table = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    return int(table[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+class BitPackedGrid:
+    """
+    Сетка игры Жизнь с упаковкой 1 бит на клетку
+    
+    Каждая строка хранится как массив слов uint64: бит j слова k
+    соответствует столбцу 64*k + j. Биты за пределами ширины сетки
+    всегда равны нулю. Шаг считается побитовыми сумматорами сразу
+    для 64 клеток, полосами строк, чтобы временные массивы оставались
+    небольшими даже для миллиардов клеток.
+    """
+    WORD_BITS = 64
+    # Размер полосы строк при шаге и распаковке
+    BAND_ROWS = 256
+    
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.n_words = (width + self.WORD_BITS - 1) // self.WORD_BITS
+        self.words = np.zeros((height, self.n_words), dtype=np.uint64)
+        
+        # Маска значимых битов последнего слова строки
+        tail_bits = width - (self.n_words - 1) * self.WORD_BITS
+        self._tail_mask = np.uint64((1 << tail_bits) - 1)
+        self._tail_shift = np.uint64(tail_bits - 1)
+    
+    @property
+    def shape(self):
+        return (self.height, self.width)
+    
+    @classmethod
+    def from_dense(cls, grid):
+        """Упаковка обычной 0/1 сетки"""
+        height, width = grid.shape
+        packed = cls(height, width)
+        for start in range(0, height, cls.BAND_ROWS):
+            stop = min(start + cls.BAND_ROWS, height)
+            packed.words[start:stop] = packed._pack_rows(grid[start:stop])
+        return packed
+    
+    def _pack_rows(self, rows):
+        """Упаковка блока строк в слова uint64"""
+        padded = np.zeros((rows.shape[0], self.n_words * self.WORD_BITS), dtype=np.uint8)
+        padded[:, :self.width] = rows
+        packed_bytes = np.packbits(padded, axis=1, bitorder='little')
+        return packed_bytes.view('<u8').astype(np.uint64, copy=False)
+    
+    def _unpack_rows(self, words):
+        """Распаковка блока слов в строки 0/1 (uint8)"""
+        as_bytes = np.ascontiguousarray(words).astype('<u8', copy=False).view(np.uint8)
+        bits = np.unpackbits(as_bytes, axis=1, bitorder='little')
+        return bits[:, :self.width]
+    
+    def to_dense(self, dtype=int):
+        """Распаковка всей сетки в обычный массив"""
+        dense = np.empty((self.height, self.width), dtype=dtype)
+        for start in range(0, self.height, self.BAND_ROWS):
+            stop = min(start + self.BAND_ROWS, self.height)
+            dense[start:stop] = self._unpack_rows(self.words[start:stop])
+        return dense
+    
+    def iter_dense_bands(self, dtype=int, band_rows=None):
+        """Построчная распаковка полосами (для потоковой записи)"""
+        band_rows = band_rows or self.BAND_ROWS
+        for start in range(0, self.height, band_rows):
+            stop = min(start + band_rows, self.height)
+            yield self._unpack_rows(self.words[start:stop]).astype(dtype)
+    
+    def __array__(self, dtype=None, copy=None):
+        return self.to_dense(dtype if dtype is not None else int)
+    
+    def _normalize_key(self, key):
+        if not isinstance(key, tuple):
+            key = (key, slice(None))
+        row_key, col_key = key
+        squeeze_row = isinstance(row_key, (int, np.integer))
+        if squeeze_row:
+            row_key = slice(row_key, row_key + 1) if row_key != -1 else slice(-1, None)
+        return row_key, col_key, squeeze_row
+    
+    def __getitem__(self, key):
+        row_key, col_key, squeeze_row = self._normalize_key(key)
+        rows = self._unpack_rows(self.words[row_key]).astype(int)[:, col_key]
+        return rows[0] if squeeze_row else rows
+    
+    def __setitem__(self, key, value):
+        row_key, col_key, _ = self._normalize_key(key)
+        rows = self._unpack_rows(self.words[row_key])
+        rows[:, col_key] = value
+        self.words[row_key] = self._pack_rows(rows)
+    
+    def copy(self):
+        duplicate = BitPackedGrid(self.height, self.width)
+        duplicate.words[...] = self.words
+        return duplicate
+    
+    def count_alive(self):
+        """Количество живых клеток"""
+        return _popcount_words(self.words)
+    
+    def _shift_west(self, words):
+        """Значение западного соседа (столбец c-1) для каждой клетки"""
+        one = np.uint64(1)
+        shifted = words << one
+        shifted[:, 1:] |= words[:, :-1] >> np.uint64(self.WORD_BITS - 1)
+        # Перенос с последнего столбца в нулевой (тор)
+        shifted[:, 0] |= (words[:, -1] >> self._tail_shift) & one
+        shifted[:, -1] &= self._tail_mask
+        return shifted
+    
+    def _shift_east(self, words):
+        """Значение восточного соседа (столбец c+1) для каждой клетки"""
+        one = np.uint64(1)
+        shifted = words >> one
+        shifted[:, :-1] |= words[:, 1:] << np.uint64(self.WORD_BITS - 1)
+        # Перенос с нулевого столбца в последний (тор)
+        shifted[:, -1] |= (words[:, 0] & one) << self._tail_shift
+        return shifted
+    
+    def step(self, out=None):
+        """
+        Следующее поколение по правилам Конвея
+        
+        Для каждой строки считаются двухбитные суммы по горизонтали
+        (три клетки для строк сверху/снизу, две для своей), затем они
+        складываются битовыми сумматорами в счетчик соседей (s2 s1 s0).
+        Значение 8 дает 0 по модулю 8, что не влияет на правила.
+        """
+        if out is None:
+            out = BitPackedGrid(self.height, self.width)
+        
+        for start in range(0, self.height, self.BAND_ROWS):
+            stop = min(start + self.BAND_ROWS, self.height)
+            # Полоса с одной строкой ореола сверху и снизу (с переносом)
+            rows = np.arange(start - 1, stop + 1) % self.height
+            band = self.words[rows]
+            west = self._shift_west(band)
+            east = self._shift_east(band)
+            
+            # Сумма трех клеток строки: (h1, h0)
+            h0 = west ^ band ^ east
+            h1 = (west & band) | (east & (west ^ band))
+            # Сумма двух соседей в своей строке: (m1, m0)
+            m0 = (west ^ east)[1:-1]
+            m1 = (west & east)[1:-1]
+            
+            u0, u1 = h0[:-2], h1[:-2]
+            d0, d1 = h0[2:], h1[2:]
+            alive = band[1:-1]
+            
+            # Младший бит и перенос
+            s0 = u0 ^ d0 ^ m0
+            carry = (u0 & d0) | (m0 & (u0 ^ d0))
+            # Второй и третий биты: сумма четырех битов u1, d1, m1, carry
+            p = u1 ^ d1
+            q = u1 & d1
+            r = m1 ^ carry
+            s = m1 & carry
+            s1 = p ^ r
+            s2 = q ^ s ^ (p & r)
+            
+            out.words[start:stop] = s1 & ~s2 & (s0 | alive)
+        
+        return out
+
+
+class _QuadNode:
+    """Узел квадродерева HashLife (канонический, неизменяемый)"""
+    __slots__ = ('nw', 'ne', 'sw', 'se', 'level', 'population', '__weakref__')
+    
+    def __init__(self, nw, ne, sw, se, level, population):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.population = population
+
+
+class HashLife:
+    """
+    Движок HashLife: хеш-консинг узлов квадродерева и мемоизация будущего
+    
+    Каждый узел уровня L описывает квадрат 2^L x 2^L. Одинаковые квадраты
+    представлены одним и тем же объектом, поэтому результат (центральный
+    квадрат через 2^j поколений) кешируется по паре (узел, j).
+    
+    Тороидальная сетка эквивалентна бесконечной плоскости, замощенной
+    копиями сетки, поэтому скачок на 2^j поколений считается как результат
+    узла, покрывающего замощение, а из центра результата вырезается
+    одна копия сетки.
+    """
+    
+    def __init__(self, max_cache_size=200000):
+        """
+        Args:
+            max_cache_size: максимальное число записей в кеше результатов
+                            (при переполнении вытесняются давно неиспользуемые)
+        """
+        self.max_cache_size = max_cache_size
+        # Таблица канонических узлов; узлы удаляются, когда на них нет ссылок
+        self._nodes = weakref.WeakValueDictionary()
+        self._results = OrderedDict()
+        self._empty = {}
+        self.off = _QuadNode(None, None, None, None, 0, 0)
+        self.on = _QuadNode(None, None, None, None, 0, 1)
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def join(self, nw, ne, sw, se):
+        """Канонический узел из четырех дочерних"""
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            population = nw.population + ne.population + sw.population + se.population
+            node = _QuadNode(nw, ne, sw, se, nw.level + 1, population)
+            self._nodes[key] = node
+        return node
+    
+    def empty(self, level):
+        """Пустой узел заданного уровня"""
+        node = self._empty.get(level)
+        if node is None:
+            if level == 0:
+                node = self.off
+            else:
+                child = self.empty(level - 1)
+                node = self.join(child, child, child, child)
+            self._empty[level] = node
+        return node
+    
+    def _center(self, node):
+        return self.join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+    
+    def _horizontal_center(self, west, east):
+        return self.join(west.ne, east.nw, west.se, east.sw)
+    
+    def _vertical_center(self, north, south):
+        return self.join(north.sw, north.se, south.nw, south.ne)
+    
+    def _base_successor(self, node):
+        """Центр 2x2 узла 4x4 через одно поколение (прямой подсчет)"""
+        cells = [[0] * 4 for _ in range(4)]
+        for quad, (row0, col0) in ((node.nw, (0, 0)), (node.ne, (0, 2)),
+                                   (node.sw, (2, 0)), (node.se, (2, 2))):
+            cells[row0][col0] = quad.nw.population
+            cells[row0][col0 + 1] = quad.ne.population
+            cells[row0 + 1][col0] = quad.sw.population
+            cells[row0 + 1][col0 + 1] = quad.se.population
+        
+        result = []
+        for row in (1, 2):
+            for col in (1, 2):
+                neighbors = sum(cells[row + i][col + j]
+                                for i in (-1, 0, 1) for j in (-1, 0, 1)) - cells[row][col]
+                alive = neighbors == 3 or (cells[row][col] == 1 and neighbors == 2)
+                result.append(self.on if alive else self.off)
+        return self.join(*result)
+    
+    def successor(self, node, j):
+        """
+        Центральный узел уровня L-1 через 2^j поколений (j <= L-2)
+        """
+        if node.population == 0:
+            return self.empty(node.level - 1)
+        
+        key = (node, j)
+        result = self._results.get(key)
+        if result is not None:
+            self.cache_hits += 1
+            self._results.move_to_end(key)
+            return result
+        self.cache_misses += 1
+        
+        if node.level == 2:
+            result = self._base_successor(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            parts = [nw, self._horizontal_center(nw, ne), ne,
+                     self._vertical_center(nw, sw), self._center(node), self._vertical_center(ne, se),
+                     sw, self._horizontal_center(sw, se), se]
+            
+            if j == node.level - 2:
+                # Полная скорость: два полушага по 2^(j-1)
+                parts = [self.successor(part, j - 1) for part in parts]
+                inner_step = j - 1
+            else:
+                # Первая половина без продвижения во времени
+                parts = [self._center(part) for part in parts]
+                inner_step = j
+            
+            p = parts
+            result = self.join(
+                self.successor(self.join(p[0], p[1], p[3], p[4]), inner_step),
+                self.successor(self.join(p[1], p[2], p[4], p[5]), inner_step),
+                self.successor(self.join(p[3], p[4], p[6], p[7]), inner_step),
+                self.successor(self.join(p[4], p[5], p[7], p[8]), inner_step),
+            )
+        
+        self._results[key] = result
+        if len(self._results) > self.max_cache_size:
+            self._results.popitem(last=False)
+        return result
+    
+    def from_torus(self, grid, level, origin):
+        """
+        Узел уровня level, покрывающий замощение плоскости копиями grid
+        начиная с точки (origin, origin)
+        
+        Узлы строятся с мемоизацией по позиции по модулю размеров сетки,
+        поэтому большие замощения не требуют перебора каждой клетки.
+        """
+        height, width = grid.shape
+        cells = grid.tolist()
+        memo = {}
+        
+        def build(level, x, y):
+            key = (level, x % width, y % height)
+            node = memo.get(key)
+            if node is not None:
+                return node
+            if level == 0:
+                node = self.on if cells[y % height][x % width] else self.off
+            else:
+                half = 1 << (level - 1)
+                node = self.join(build(level - 1, x, y), build(level - 1, x + half, y),
+                                 build(level - 1, x, y + half), build(level - 1, x + half, y + half))
+            memo[key] = node
+            return node
+        
+        return build(level, origin, origin)
+    
+    def to_array(self, node, height, width):
+        """Левый верхний прямоугольник height x width узла как массив 0/1"""
+        out = np.zeros((height, width), dtype=int)
+        
+        def write(node, x, y):
+            if node.population == 0 or x >= width or y >= height:
+                return
+            if node.level == 0:
+                out[y, x] = 1
+                return
+            half = 1 << (node.level - 1)
+            write(node.nw, x, y)
+            write(node.ne, x + half, y)
+            write(node.sw, x, y + half)
+            write(node.se, x + half, y + half)
+        
+        write(node, 0, 0)
+        return out
+    
+    def jump(self, grid, j):
+        """Тороидальная сетка через 2^j поколений"""
+        height, width = grid.shape
+        # Центр результата (2^(level-1)) должен вмещать целую копию сетки
+        level = max(j + 2, 1 + max(1, (max(height, width) - 1).bit_length()))
+        # Начало выбрано так, чтобы центр результата начинался в (0, 0)
+        origin = -(1 << (level - 2))
+        root = self.from_torus(grid, level, origin)
+        return self.to_array(self.successor(root, j), height, width)
+    
+    def advance(self, grid, n):
+        """Тороидальная сетка через n поколений (скачками по степеням двойки)"""
+        j = 0
+        while n:
+            if n & 1:
+                grid = self.jump(grid, j)
+            n >>= 1
+            j += 1
+        return grid
+
+
+class ActiveTileStepper:
+    """
+    Инкрементальный шаг с отслеживанием активных плиток
+    
+    Сетка делится на плитки tile_size x tile_size. Пересчитываются только
+    плитки, которые сами или их соседи (по тору) изменились на прошлом
+    шаге; остальные плитки гарантированно не меняются. Используются два
+    внутренних буфера, которые меняются местами.
+    
+    Наружу отдается копия переднего буфера, поэтому сетку можно свободно
+    менять между шагами: на следующем шаге она сравнивается с буфером,
+    и плитки с внешними правками (и их соседи) снова становятся активными.
+    """
+    
+    def __init__(self, tile_size=32, dense_threshold=0.5):
+        """
+        Args:
+            tile_size: размер плитки в клетках
+            dense_threshold: доля активных плиток, начиная с которой
+                             выгоднее пересчитать всю сетку сразу
+        """
+        self.tile_size = tile_size
+        self.dense_threshold = dense_threshold
+        self._front = None
+        self._back = None
+        self.active = None
+        self.active_tiles = 0
+    
+    def _reset(self, grid):
+        """Захват новой сетки: все плитки активны"""
+        height, width = grid.shape
+        self._front = np.array(grid, dtype=int)
+        self._back = np.empty_like(self._front)
+        tiles_y = -(-height // self.tile_size)
+        tiles_x = -(-width // self.tile_size)
+        self.active = np.ones((tiles_y, tiles_x), dtype=bool)
+    
+    def _changed_tiles_dense(self, new, old):
+        """Маска изменившихся плиток по всей сетке"""
+        height, width = new.shape
+        tiles_y, tiles_x = self.active.shape
+        diff = np.zeros((tiles_y * self.tile_size, tiles_x * self.tile_size), dtype=bool)
+        np.not_equal(new, old, out=diff[:height, :width])
+        return diff.reshape(tiles_y, self.tile_size, tiles_x, self.tile_size).any(axis=(1, 3))
+    
+    @staticmethod
+    def _with_neighbors(tiles):
+        """Маска плиток вместе с соседями (по тору)"""
+        result = tiles.copy()
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                if dy or dx:
+                    result |= np.roll(tiles, (dy, dx), axis=(0, 1))
+        return result
+    
+    def _sync(self, grid):
+        """Перенос внешних правок сетки в передний буфер"""
+        if self._front is None or grid.shape != self._front.shape:
+            self._reset(grid)
+            return
+        edited = self._changed_tiles_dense(grid, self._front)
+        if edited.any():
+            self._front[...] = grid
+            self.active |= self._with_neighbors(edited)
+    
+    def _step_tile(self, ty, tx):
+        """Пересчет одной плитки в задний буфер; True, если она изменилась"""
+        grid = self._front
+        height, width = grid.shape
+        size = self.tile_size
+        r0, c0 = ty * size, tx * size
+        r1, c1 = min(r0 + size, height), min(c0 + size, width)
+        
+        if r0 > 0 and c0 > 0 and r1 < height and c1 < width:
+            block = grid[r0 - 1:r1 + 1, c0 - 1:c1 + 1]
+        else:
+            # Плитка у края: ореол с переносом по тору
+            rows = np.arange(r0 - 1, r1 + 1) % height
+            cols = np.arange(c0 - 1, c1 + 1) % width
+            block = grid[np.ix_(rows, cols)]
+        
+        h, w = r1 - r0, c1 - c0
+        neighbors = np.zeros((h, w), dtype=int)
+        for dr in range(3):
+            for dc in range(3):
+                if dr == 1 and dc == 1:
+                    continue
+                neighbors += block[dr:dr + h, dc:dc + w]
+        
+        current = block[1:-1, 1:-1]
+        new_tile = self._back[r0:r1, c0:c1]
+        np.logical_or(neighbors == 3, (current == 1) & (neighbors == 2), out=new_tile, casting='unsafe')
+        return not np.array_equal(new_tile, current)
+    
+    def step(self, grid):
+        """Следующее поколение для grid (с учетом активности прошлого шага)"""
+        self._sync(grid)
+        
+        tile_ids = np.argwhere(self.active)
+        self.active_tiles = len(tile_ids)
+        
+        if self.active_tiles >= self.dense_threshold * self.active.size:
+            self._back[...] = conway_step(self._front)
+            changed = self._changed_tiles_dense(self._back, self._front)
+        else:
+            changed = np.zeros_like(self.active)
+            for ty, tx in tile_ids:
+                changed[ty, tx] = self._step_tile(ty, tx)
+        
+        # Активны изменившиеся плитки и их соседи (по тору)
+        self.active = self._with_neighbors(changed)
+        
+        self._front, self._back = self._back, self._front
+        return self._front.copy()
+
+
+class CycleDetector:
+    """
+    Обнаружение неподвижных точек и циклов по хешам поколений
+    
+    Хеши последних history_size поколений хранятся в кольцевом буфере.
+    Повтор хеша означает, что система вошла в цикл: период равен разнице
+    поколений, а длина переходного процесса - числу поколений от первого
+    наблюдения до первого поколения цикла (номер которого - cycle_start).
+    Обнаруживаются циклы с периодом не больше history_size.
+    """
+    
+    def __init__(self, history_size=256):
+        self.history_size = history_size
+        self._ring = deque()
+        self._seen = {}
+        self.start_generation = None
+        self.period = None
+        self.transient = None
+        self.cycle_start = None
+    
+    @staticmethod
+    def digest(grid):
+        """Хеш состояния сетки"""
+        if isinstance(grid, BitPackedGrid):
+            data = grid.words.tobytes()
+        else:
+            data = np.ascontiguousarray(grid, dtype=np.uint8).tobytes()
+        return hashlib.blake2b(data, digest_size=16).digest()
+    
+    def observe(self, generation, grid):
+        """
+        Запись поколения; True, если состояние уже встречалось
+        """
+        if self.start_generation is None:
+            self.start_generation = generation
+        digest = self.digest(grid)
+        first_generation = self._seen.get(digest)
+        if first_generation is not None:
+            self.period = generation - first_generation
+            self.transient = first_generation - self.start_generation
+            self.cycle_start = first_generation
+            return True
+        
+        self._ring.append(digest)
+        self._seen[digest] = generation
+        if len(self._ring) > self.history_size:
+            del self._seen[self._ring.popleft()]
+        return False
+
+
+def _step_band(src, dst, row_start, row_stop):
+    """Шаг для полосы строк [row_start, row_stop) с ореолом из соседних полос"""
+    height = src.shape[0]
+    # Обмен ореолом: строки соседних полос читаются из общей памяти (с переносом)
+    rows = np.arange(row_start - 1, row_stop + 1) % height
+    block = src[rows].astype(np.uint8)
+    horizontal = block + np.roll(block, 1, axis=1) + np.roll(block, -1, axis=1)
+    # Сумма 3x3 вместе с самой клеткой
+    total = horizontal[:-2] + horizontal[1:-1] + horizontal[2:]
+    center = block[1:-1]
+    dst[row_start:row_stop] = (total == 3) | ((center == 1) & (total == 4))
+
+
+def _parallel_worker(buffer_names, shape, row_start, row_stop, barrier, conn, timeout):
+    """
+    Процесс-обработчик полосы строк, работающий прямо в общей памяти
+    
+    На каждую команду отвечает True или, при ошибке (в том числе при
+    ожидании барьера дольше timeout секунд), строкой с ее описанием и
+    завершается.
+    """
+    segments = [shared_memory.SharedMemory(name=name) for name in buffer_names]
+    buffers = [np.ndarray(shape, dtype=np.uint8, buffer=seg.buf) for seg in segments]
+    try:
+        while True:
+            command = conn.recv()
+            if command is None:
+                break
+            front, generations = command
+            try:
+                for generation in range(generations):
+                    src = buffers[(front + generation) % 2]
+                    dst = buffers[(front + generation + 1) % 2]
+                    _step_band(src, dst, row_start, row_stop)
+                    # Все полосы должны закончить поколение до чтения следующего
+                    barrier.wait(timeout)
+            except Exception as error:
+                # Сломанный барьер сразу освобождает остальные процессы
+                barrier.abort()
+                conn.send(f"{type(error).__name__}: {error}")
+                break
+            conn.send(True)
+    finally:
+        del buffers
+        for seg in segments:
+            seg.close()
+
+
+class ParallelStepper:
+    """
+    Многопроцессный шаг: сетка делится на полосы строк
+    
+    Сетка хранится в двух блоках multiprocessing.shared_memory (двойная
+    буферизация). Каждый процесс считает свою полосу, читая по одной
+    строке ореола у соседних полос прямо из общей памяти, и ждет
+    остальных на барьере. Процессам передаются только короткие команды,
+    сетка не сериализуется на каждом шаге.
+    
+    Если процесс упал или не дождался остальных на барьере за timeout
+    секунд, step останавливает все процессы, освобождает общую память
+    и выбрасывает RuntimeError (а не зависает).
+    """
+    
+    # Период проверки, живы ли процессы, пока ждем их ответа, сек
+    POLL_INTERVAL = 0.1
+    
+    def __init__(self, n_workers=None, start_method=None, timeout=60.0):
+        """
+        Args:
+            n_workers: число процессов (по умолчанию - число ядер)
+            start_method: способ запуска процессов ('fork', 'spawn', ...)
+            timeout: сколько секунд процесс ждет остальных на барьере
+        """
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._context = multiprocessing.get_context(start_method)
+        self._shape = None
+        self._segments = []
+        self._buffers = []
+        self._workers = []
+        self._connections = []
+        self._barrier = None
+        self._front = 0
+    
+    def _start(self, grid):
+        """Создание общей памяти и процессов для сетки данного размера"""
+        self.close()
+        height, width = grid.shape
+        self._shape = (height, width)
+        self._segments = [shared_memory.SharedMemory(create=True, size=max(1, height * width))
+                          for _ in range(2)]
+        self._buffers = [np.ndarray(self._shape, dtype=np.uint8, buffer=seg.buf)
+                         for seg in self._segments]
+        self._front = 0
+        
+        n_workers = min(self.n_workers, height)
+        bounds = np.linspace(0, height, n_workers + 1).astype(int)
+        # Ссылка на барьер хранится, пока процессы (при 'spawn') его не получат
+        self._barrier = barrier = self._context.Barrier(n_workers)
+        names = [seg.name for seg in self._segments]
+        for row_start, row_stop in zip(bounds[:-1], bounds[1:]):
+            parent_conn, child_conn = self._context.Pipe()
+            worker = self._context.Process(
+                target=_parallel_worker,
+                args=(names, self._shape, int(row_start), int(row_stop), barrier, child_conn,
+                      self.timeout),
+                daemon=True)
+            worker.start()
+            self._workers.append(worker)
+            self._connections.append(parent_conn)
+    
+    @property
+    def grid(self):
+        """Текущая сетка (представление общей памяти)"""
+        return self._buffers[self._front] if self._buffers else None
+    
+    def step(self, grid, generations=1, dtype=int):
+        """
+        Сетка через generations поколений
+        
+        Args:
+            dtype: тип результата (копия, как у остальных движков);
+                   None - само представление общей памяти (uint8) без копии,
+                   после close() им пользоваться нельзя
+        """
+        if grid is not self.grid:
+            if not self._workers or grid.shape != self._shape:
+                self._start(grid)
+            self._buffers[self._front][...] = grid
+        
+        try:
+            for conn in self._connections:
+                conn.send((self._front, generations))
+            self._wait_replies()
+        except (RuntimeError, EOFError, OSError) as error:
+            # Процессы в неизвестном состоянии: останавливаем все и
+            # освобождаем общую память
+            if self._barrier is not None:
+                self._barrier.abort()
+            self.close()
+            if isinstance(error, RuntimeError):
+                raise
+            raise RuntimeError(f"Потеряна связь с процессом-обработчиком: {error}") from error
+        self._front = (self._front + generations) % 2
+        return self.grid if dtype is None else self.grid.astype(dtype)
+    
+    def _wait_replies(self):
+        """Ожидание ответов всех процессов с проверкой, что они живы"""
+        pending = list(self._connections)
+        while pending:
+            ready = connection.wait(pending, self.POLL_INTERVAL)
+            for conn in ready:
+                reply = conn.recv()
+                if reply is not True:
+                    raise RuntimeError(f"Ошибка в процессе-обработчике: {reply}")
+                pending.remove(conn)
+            if not ready:
+                for worker in self._workers:
+                    if not worker.is_alive():
+                        raise RuntimeError(f"Процесс-обработчик {worker.pid} завершился "
+                                           f"с кодом {worker.exitcode}")
+    
+    def close(self):
+        """Остановка процессов и освобождение общей памяти"""
+        for conn in self._connections:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self._buffers = []
+        for seg in self._segments:
+            seg.close()
+            seg.unlink()
+        self._segments = []
+        self._workers = []
+        self._connections = []
+        self._barrier = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def benchmark_parallel_scaling(width=2048, height=2048, generations=50,
+                               max_workers=None, alive_probability=0.3, seed=42):
+    """
+    Замер масштабирования ParallelStepper от 1 до max_workers процессов
+    
+    Returns:
+        список словарей: workers, seconds, generations_per_sec, speedup
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    rng = np.random.default_rng(seed)
+    grid = (rng.random((height, width)) < alive_probability).astype(np.uint8)
+    
+    results = []
+    base_time = None
+    workers = 1
+    while True:
+        with ParallelStepper(n_workers=workers) as stepper:
+            stepper.step(grid, 1, dtype=None)  # прогрев: запуск процессов и загрузка сетки
+            start_time = time.perf_counter()
+            stepper.step(stepper.grid, generations, dtype=None)
+            elapsed = time.perf_counter() - start_time
+        
+        base_time = base_time or elapsed
+        results.append({
+            'workers': workers,
+            'seconds': elapsed,
+            'generations_per_sec': generations / elapsed,
+            'speedup': base_time / elapsed
+        })
+        print(f"Процессов: {workers:3d}  Время: {elapsed:8.3f} с  "
+              f"Поколений/с: {generations / elapsed:8.2f}  Ускорение: {base_time / elapsed:5.2f}x")
+        
+        if workers >= max_workers:
+            break
+        workers = min(workers * 2, max_workers)
+    
+    return results
+
+
+# ============ ФОРМАТЫ ФАЙЛОВ ПАТТЕРНОВ ============
+
+# Заголовок двоичного формата: сигнатура + height, width, generation, seed, words_per_row
+BINARY_MAGIC = b'LIFEBIN1'
+BINARY_HEADER = struct.Struct('<8sQQQqQ')
+# Максимальная длина строки тела RLE (по стандарту формата)
+RLE_LINE_LENGTH = 70
+# Лексема тела RLE: необязательное число и символ состояния/конца строки
+RLE_TOKEN = re.compile(r'(\d*)([^\d\s]?)')
+
+
+def _iter_row_bands(grid, band_rows=BitPackedGrid.BAND_ROWS):
+    """Строки сетки полосами (uint8), для обычной и упакованной сетки"""
+    if isinstance(grid, BitPackedGrid):
+        yield from grid.iter_dense_bands(np.uint8, band_rows)
+    else:
+        for start in range(0, grid.shape[0], band_rows):
+            yield np.asarray(grid[start:start + band_rows], dtype=np.uint8)
+
+
+class _RowSink:
+    """Приемник строк при потоковой загрузке: обычная или упакованная сетка"""
+    
+    def __init__(self, height, width, packed):
+        self.packed = packed
+        if packed:
+            self.grid = BitPackedGrid(height, width)
+        else:
+            self.grid = np.zeros((height, width), dtype=int)
+    
+    def put(self, row_index, row):
+        if self.packed:
+            self.grid.words[row_index] = self.grid._pack_rows(row[np.newaxis])[0]
+        else:
+            self.grid[row_index] = row
+
+
+def write_rle(filename, grid, generation=0, seed=None, rule='B3/S23'):
+    """
+    Сохранение в стандартный формат RLE (построчно, без распаковки всей сетки)
+    
+    Номер поколения записывается в строку '#CXRLE Gen=...', семя - в
+    комментарий '#C seed = ...'. Правило - строка или LifeRule (тогда
+    окрестность и границы записываются суффиксами Golly, см. LifeRule.rle_rule).
+    """
+    height, width = grid.shape
+    if isinstance(rule, LifeRule):
+        rule = rule.rle_rule(width, height)
+    with open(filename, 'w') as f:
+        f.write(f"#CXRLE Gen={generation}\n")
+        if seed is not None:
+            f.write(f"#C seed = {seed}\n")
+        f.write(f"x = {width}, y = {height}, rule = {rule}\n")
+        
+        line = []
+        line_length = 0
+        pending_rows = 0
+        
+        def emit(count, tag):
+            nonlocal line_length
+            token = f"{count if count > 1 else ''}{tag}"
+            if line_length + len(token) > RLE_LINE_LENGTH:
+                f.write(''.join(line) + '\n')
+                line.clear()
+                line_length = 0
+            line.append(token)
+            line_length += len(token)
+        
+        for band in _iter_row_bands(grid):
+            for row in band:
+                alive = np.flatnonzero(row)
+                if len(alive) == 0:
+                    pending_rows += 1
+                    continue
+                if pending_rows:
+                    emit(pending_rows, '$')
+                    pending_rows = 0
+                
+                # Границы серий: разрывы в номерах живых клеток
+                breaks = np.flatnonzero(np.diff(alive) > 1)
+                starts = np.concatenate(([alive[0]], alive[breaks + 1]))
+                stops = np.concatenate((alive[breaks] + 1, [alive[-1] + 1]))
+                position = 0
+                for start, stop in zip(starts.tolist(), stops.tolist()):
+                    if start > position:
+                        emit(start - position, 'b')
+                    emit(stop - start, 'o')
+                    position = stop
+                pending_rows = 1
+        
+        emit(1, '!')
+        f.write(''.join(line) + '\n')
+
+
+def read_rle(filename, packed=False):
+    """
+    Потоковая загрузка RLE
+    
+    Returns:
+        (сетка, поколение, семя, правило) - семя и правило None, если не записаны
+    """
+    generation = 0
+    seed = None
+    rule = None
+    sink = None
+    row_index = 0
+    column = 0
+    row = None
+    count_digits = ''
+    
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if sink is None:
+                if line.startswith('#'):
+                    gen_match = re.search(r'Gen=(-?\d+)', line)
+                    if line.startswith('#CXRLE') and gen_match:
+                        generation = int(gen_match.group(1))
+                    seed_match = re.match(r'#C\s+seed\s*=\s*(-?\d+)', line)
+                    if seed_match:
+                        seed = int(seed_match.group(1))
+                    continue
+                header = dict(part.split('=') for part in line.replace(' ', '').split(',')
+                              if '=' in part)
+                width, height = int(header['x']), int(header['y'])
+                # Правило читается до конца строки: в суффиксе ':P<w>,<h>' есть запятая
+                rule_match = re.search(r'rule\s*=\s*(\S+)', line)
+                rule = rule_match.group(1) if rule_match else None
+                sink = _RowSink(height, width, packed)
+                row = np.zeros(width, dtype=np.uint8)
+                continue
+            
+            for digits, char in RLE_TOKEN.findall(line):
+                digits = count_digits + digits
+                count_digits = ''
+                if not char:
+                    # Число перенесено на следующую строку
+                    count_digits = digits
+                    continue
+                count = int(digits) if digits else 1
+                if char == 'b':
+                    column += count
+                elif char == '$' or char == '!':
+                    sink.put(row_index, row)
+                    row[:] = 0
+                    row_index += count
+                    column = 0
+                    if char == '!':
+                        return sink.grid, generation, seed, rule
+                else:
+                    # 'o' и любые другие состояния считаются живыми
+                    row[column:column + count] = 1
+                    column += count
+    
+    if sink is None:
+        raise ValueError(f"Нет заголовка RLE в файле {filename}")
+    if row_index < sink.grid.shape[0]:
+        sink.put(row_index, row)
+    return sink.grid, generation, seed, rule
+
+
+def write_packed_binary(filename, grid, generation=0, seed=None):
+    """
+    Сохранение в двоичный формат: заголовок + строки слов uint64 (1 бит на клетку)
+    
+    Данные лежат в той же раскладке, что и BitPackedGrid.words, поэтому файл
+    можно отобразить в память без разбора.
+    """
+    height, width = grid.shape
+    packer = BitPackedGrid(0, width)
+    with open(filename, 'wb') as f:
+        f.write(BINARY_HEADER.pack(BINARY_MAGIC, height, width, generation,
+                                   -1 if seed is None else seed, packer.n_words))
+        if isinstance(grid, BitPackedGrid):
+            for start in range(0, height, grid.BAND_ROWS):
+                f.write(grid.words[start:start + grid.BAND_ROWS].astype('<u8', copy=False).tobytes())
+        else:
+            for band in _iter_row_bands(grid):
+                f.write(packer._pack_rows(band).astype('<u8', copy=False).tobytes())
+
+
+def read_packed_binary(filename, packed=False):
+    """
+    Загрузка двоичного формата через np.memmap
+    
+    Для упакованной сетки слова отображаются в память в режиме
+    копирования при записи, поэтому загрузка не читает файл целиком.
+    
+    Returns:
+        (сетка, поколение, семя)
+    """
+    with open(filename, 'rb') as f:
+        header = f.read(BINARY_HEADER.size)
+    magic, height, width, generation, seed, n_words = BINARY_HEADER.unpack(header)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"Файл {filename} не является двоичным паттерном")
+    
+    words = np.memmap(filename, dtype='<u8', mode='c', offset=BINARY_HEADER.size,
+                      shape=(height, n_words))
+    packed_grid = BitPackedGrid(0, width)
+    packed_grid.height = height
+    packed_grid.words = words
+    grid = packed_grid if packed else packed_grid.to_dense()
+    return grid, generation, (None if seed == -1 else seed)
+
 
 class GameOfLife:
-    def __init__(self, width=30, height=30, alive_probability=0.3, seed=None):
+    # Доступные движки расчета поколения
+    ENGINES = ('reference', 'vectorized', 'bitpacked', 'hashlife', 'sparse', 'parallel')
+    # Движки, поддерживающие произвольные правила B/S (остальные - только Конвей)
+    RULE_ENGINES = ('vectorized',)
+    
+    def __init__(self, width=30, height=30, alive_probability=0.3, seed=None,
+                 engine='reference', n_workers=None, rng=None, verbose=True,
+                 rule='B3/S23'):
         """
         Инициализация игры Жизнь
         
@@ -14,17 +1165,43 @@ class GameOfLife:
             height: высота сетки
             alive_probability: вероятность живой клетки при случайной генерации
             seed: семя для генератора случайных чисел (для воспроизводимости)
+            engine: движок расчета поколения ('reference' - поклеточный,
+                    'vectorized' - NumPy для всей сетки сразу,
+                    'bitpacked' - 1 бит на клетку для очень больших сеток,
+                    'hashlife' - скачки на 2^k поколений через advance(),
+                    'sparse' - пересчет только активных плиток,
+                    'parallel' - полосы строк в нескольких процессах)
+            n_workers: число процессов для движка 'parallel'
+            rng: собственный np.random.Generator; если задан, глобальное
+                 состояние np.random и random не изменяется
+            verbose: печатать ли служебные сообщения
+            rule: правило B/S - строка ('B3/S23', 'highlife', ...) или LifeRule;
+                  отличные от Конвея правила поддерживает движок 'vectorized'
         """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Неизвестный движок: {engine}. Доступны: {self.ENGINES}")
+        
         self.width = width
         self.height = height
+        self.engine = engine
+        self._set_rule(rule)
+        self._hashlife = HashLife() if engine == 'hashlife' else None
+        self._tile_stepper = ActiveTileStepper() if engine == 'sparse' else None
+        self._parallel = ParallelStepper(n_workers) if engine == 'parallel' else None
+        
+        self.rng = rng
+        self.verbose = verbose
         
         # Установка семени для уникальности каждого студента
-        if seed is None:
-            seed = random.randint(1, 10000)
-        np.random.seed(seed)
-        random.seed(seed)
+        if rng is None:
+            if seed is None:
+                seed = random.randint(1, 10000)
+            np.random.seed(seed)
+            random.seed(seed)
+        self.seed = seed
         
-        print(f"Семя генератора: {seed} (сохраните для воспроизводимости)")
+        if verbose:
+            print(f"Семя генератора: {seed} (сохраните для воспроизводимости)")
         
         # Создание случайной сетки
         self.grid = self.create_random_grid(alive_probability)
@@ -37,10 +1214,45 @@ class GameOfLife:
         
         self.generation = 0
         
+        # Обнаруженный цикл (период и длина переходного процесса)
+        self.cycle_period = None
+        self.cycle_transient = None
+        
+    def _set_rule(self, rule):
+        """Установка правила с проверкой совместимости с движком"""
+        rule = rule if isinstance(rule, LifeRule) else LifeRule(rule)
+        if not rule.is_conway and self.engine not in self.RULE_ENGINES:
+            raise ValueError(f"Движок {self.engine} поддерживает только B3/S23 на торе; "
+                             f"для правила {rule.rulestring} используйте {self.RULE_ENGINES}")
+        self.rule = rule
+    
     def create_random_grid(self, alive_probability):
         """Создание случайной сетки с заданной вероятностью живых клеток"""
-        return np.random.choice([0, 1], size=(self.height, self.width), 
-                               p=[1-alive_probability, alive_probability])
+        if self.engine == 'bitpacked':
+            return self._create_random_packed_grid(alive_probability)
+        return self._random_source().choice([0, 1], size=(self.height, self.width), 
+                                            p=[1-alive_probability, alive_probability])
+    
+    def _random_source(self):
+        """Собственный генератор, если задан, иначе глобальный np.random"""
+        return self.rng if self.rng is not None else np.random
+    
+    def _create_random_packed_grid(self, alive_probability):
+        """
+        Случайная упакованная сетка, генерируемая полосами строк
+        
+        Последовательные вызовы choice дают тот же поток чисел,
+        что и один большой вызов, поэтому при одинаковом семени сетка
+        совпадает с сеткой остальных движков.
+        """
+        packed = BitPackedGrid(self.height, self.width)
+        band_rows = max(1, (1 << 22) // max(1, self.width))
+        for start in range(0, self.height, band_rows):
+            stop = min(start + band_rows, self.height)
+            rows = self._random_source().choice([0, 1], size=(stop - start, self.width),
+                                                p=[1-alive_probability, alive_probability])
+            packed.words[start:stop] = packed._pack_rows(rows)
+        return packed
     
     def add_blinker_pattern(self):
         """
@@ -93,8 +1305,9 @@ class GameOfLife:
         # Размещение паттерна
         self.grid[start_row:end_row, start_col:end_col] = blinker
         
-        print(f"Паттерн Blinker добавлен в позицию ({start_row}, {start_col})")
-        print(f"Конфликтов с существующими клетками: {min_conflicts}")
+        if self.verbose:
+            print(f"Паттерн Blinker добавлен в позицию ({start_row}, {start_col})")
+            print(f"Конфликтов с существующими клетками: {min_conflicts}")
     
     def count_neighbors(self, row, col):
         """Подсчет живых соседей для клетки"""
@@ -111,7 +1324,65 @@ class GameOfLife:
         return count
     
     def update_grid(self):
-        """Обновление сетки согласно правилам игры Конвея"""
+        """Обновление сетки согласно правилу (по умолчанию - правила игры Конвея)"""
+        if self.engine == 'vectorized':
+            self.grid = self.rule.step(self.grid)
+        elif self.engine == 'hashlife':
+            # Для одиночного шага HashLife не выгоден, результат тот же
+            self.grid = conway_step(self.grid)
+        elif self.engine == 'bitpacked':
+            self.grid = self.grid.step()
+        elif self.engine == 'sparse':
+            self.grid = self._tile_stepper.step(self.grid)
+        elif self.engine == 'parallel':
+            self.grid = self._parallel.step(self.grid)
+        else:
+            self.grid = self._next_grid_reference()
+        self.generation += 1
+    
+    def advance(self, n):
+        """
+        Перемотка на n поколений вперед
+        
+        Результат совпадает с n вызовами update_grid. Движок 'hashlife'
+        выполняет перемотку скачками по 2^k поколений.
+        
+        Returns:
+            сетка после перемотки
+        """
+        if self.engine == 'hashlife':
+            self.grid = self._hashlife.advance(self.grid, n)
+            self.generation += n
+        elif self.engine == 'parallel' and n > 0:
+            # Все n поколений за одну команду процессам
+            self.grid = self._parallel.step(self.grid, n)
+            self.generation += n
+        else:
+            for _ in range(n):
+                self.update_grid()
+        return self.grid
+    
+    def close(self):
+        """Освобождение ресурсов движка (процессы и общая память 'parallel')"""
+        if self._parallel is not None:
+            self.grid = np.array(self.grid, dtype=int)
+            self.initial_grid = np.array(self.initial_grid, dtype=int)
+            self._parallel.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def __del__(self):
+        # Страховка, если close() не вызван: процессы и общая память 'parallel'
+        parallel = getattr(self, '_parallel', None)
+        if parallel is not None:
+            parallel.close()
+    
+    def _next_grid_reference(self):
+        """Эталонный поклеточный расчет следующего поколения"""
         new_grid = np.zeros((self.height, self.width), dtype=int)
         
         for row in range(self.height):
@@ -131,12 +1402,11 @@ class GameOfLife:
                     if neighbors == 3:  # Рождение
                         new_grid[row, col] = 1
         
-        self.grid = new_grid
-        self.generation += 1
+        return new_grid
     
     def get_stats(self):
         """Получение статистики текущего поколения"""
-        alive_cells = np.sum(self.grid)
+        alive_cells = self._count_alive()
         total_cells = self.width * self.height
         density = alive_cells / total_cells
         
@@ -144,25 +1414,44 @@ class GameOfLife:
             'generation': self.generation,
             'alive_cells': alive_cells,
             'total_cells': total_cells,
-            'density': density
+            'density': density,
+            'period': self.cycle_period,
+            'transient': self.cycle_transient
         }
     
+    def _count_alive(self):
+        """Количество живых клеток текущей сетки (int для всех движков)"""
+        if self.engine == 'bitpacked':
+            return int(self.grid.count_alive())
+        return int(np.sum(self.grid))
+    
     def reset(self):
         """Сброс к начальному состоянию"""
         self.grid = self.initial_grid.copy()
         self.generation = 0
+        self.cycle_period = None
+        self.cycle_transient = None
     
-    def run_simulation(self, steps=100, show_animation=True):
+    def run_simulation(self, steps=100, show_animation=True, detect_cycles=True,
+                       history_size=256, fast_forward=False):
         """
         Запуск симуляции
         
         Args:
             steps: количество шагов симуляции
             show_animation: показывать ли анимацию
+            detect_cycles: останавливаться при неподвижной точке или цикле
+            history_size: сколько последних поколений помнить для поиска цикла
+            fast_forward: при найденном цикле перемотать до конца steps
+                          (иначе просто остановиться)
         """
         if show_animation:
             self.animate_simulation(steps)
         else:
+            detector = CycleDetector(history_size) if detect_cycles else None
+            if detector is not None:
+                detector.observe(self.generation, self.grid)
+            
             # Текстовый режим
             for step in range(steps):
                 stats = self.get_stats()
@@ -173,12 +1462,82 @@ class GameOfLife:
                 self.update_grid()
                 
                 # Остановка при вымирании всех клеток
-                if np.sum(self.grid) == 0:
+                if self._count_alive() == 0:
                     print("Все клетки погибли!")
                     break
+                
+                # Остановка при повторе состояния
+                if detector is not None and detector.observe(self.generation, self.grid):
+                    self._on_cycle_detected(detector, steps - step - 1, fast_forward)
+                    break
+    
+    def _on_cycle_detected(self, detector, remaining, fast_forward):
+        """Запись найденного цикла и, при необходимости, перемотка"""
+        self.cycle_period = detector.period
+        self.cycle_transient = detector.transient
+        
+        if self.cycle_period == 1:
+            print(f"Неподвижная точка с поколения {detector.cycle_start}")
+        else:
+            print(f"Цикл с периодом {self.cycle_period} "
+                  f"(переходный процесс: {self.cycle_transient} поколений)")
+        
+        if fast_forward and remaining > 0:
+            # Состояние периодично: достаточно сделать остаток от деления шагов
+            self.advance(remaining % self.cycle_period)
+            self.generation += remaining - remaining % self.cycle_period
+            print(f"Перемотка до поколения {self.generation}")
+    
+    def _display_array(self, max_display_size=None):
+        """
+        Сетка для отображения, уменьшенная до max_display_size точек по
+        большей стороне (блок клеток живой, если жива хотя бы одна клетка)
+        
+        Уменьшение идет полосами строк, поэтому большие (в том числе
+        упакованные) сетки не распаковываются целиком.
+        """
+        factor = 1
+        if max_display_size:
+            factor = max(1, -(-max(self.height, self.width) // max_display_size))
+        if factor == 1:
+            return np.asarray(self.grid, dtype=np.uint8)
+        
+        out_height = -(-self.height // factor)
+        out_width = -(-self.width // factor)
+        out = np.zeros((out_height, out_width), dtype=np.uint8)
+        band_rows = factor * max(1, BitPackedGrid.BAND_ROWS // factor)
+        out_row = 0
+        for band in _iter_row_bands(self.grid, band_rows):
+            pooled_rows = -(-band.shape[0] // factor)
+            padded = np.zeros((pooled_rows * factor, out_width * factor), dtype=np.uint8)
+            padded[:band.shape[0], :self.width] = band
+            out[out_row:out_row + pooled_rows] = padded.reshape(
+                pooled_rows, factor, out_width, factor).max(axis=(1, 3))
+            out_row += pooled_rows
+        return out
     
-    def animate_simulation(self, steps=100):
-        """Анимированная визуализация симуляции"""
+    def animate_simulation(self, steps=100, fast=False, steps_per_frame=1,
+                           max_display_size=None, gridline_limit=100,
+                           save_to=None, interval=300):
+        """
+        Анимированная визуализация симуляции
+        
+        Args:
+            steps: количество поколений
+            fast: быстрый режим - блиттинг, заголовок не перерисовывается
+                  (поколение показывается в тексте статистики)
+            steps_per_frame: поколений между соседними кадрами
+            max_display_size: уменьшать сетку до стольких точек по большей
+                              стороне (по умолчанию 800 в быстром режиме)
+            gridline_limit: линии между клетками рисуются только если
+                            сетка не больше этого размера
+            save_to: файл .gif или видео (.mp4 и т.п.) - кадры записываются
+                     без открытия окна
+            interval: задержка между кадрами, мс
+        """
+        if max_display_size is None and fast:
+            max_display_size = 800
+        
         fig, ax = plt.subplots(figsize=(12, 10))
         
         # Создание цветовой карты
@@ -186,7 +1545,9 @@ class GameOfLife:
         cmap = ListedColormap(colors)
         
         # Начальное отображение с правильной статистикой
-        im = ax.imshow(self.grid, cmap=cmap, animated=True)
+        display = self._display_array(max_display_size)
+        im = ax.imshow(display, cmap=cmap, vmin=0, vmax=1, interpolation='nearest',
+                       animated=True)
         
         # Получаем начальную статистику
         initial_stats = self.get_stats()
@@ -194,10 +1555,11 @@ class GameOfLife:
         ax.set_xlabel('X')
         ax.set_ylabel('Y')
         
-        # Добавление сетки
-        ax.set_xticks(np.arange(-0.5, self.width, 1), minor=True)
-        ax.set_yticks(np.arange(-0.5, self.height, 1), minor=True)
-        ax.grid(which="minor", color="gray", linestyle='-', linewidth=0.5, alpha=0.3)
+        # Добавление сетки (для больших сеток линии по каждой клетке не рисуются)
+        if max(display.shape) <= gridline_limit:
+            ax.set_xticks(np.arange(-0.5, display.shape[1], 1), minor=True)
+            ax.set_yticks(np.arange(-0.5, display.shape[0], 1), minor=True)
+            ax.grid(which="minor", color="gray", linestyle='-', linewidth=0.5, alpha=0.3)
         
         # Текст для отображения статистики с начальными значениями
         initial_stats_str = (f'Поколение: {initial_stats["generation"]}\n'
@@ -207,23 +1569,25 @@ class GameOfLife:
         
         stats_text = ax.text(0.02, 0.98, initial_stats_str, transform=ax.transAxes, 
                            verticalalignment='top', fontfamily='monospace', fontsize=10,
-                           bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.9))
+                           bbox=dict(boxstyle='round', facecolor='wheat', alpha=0.9),
+                           animated=fast)
         
         def animate(frame):
             # Для первого кадра показываем начальное состояние (поколение 0)
             # Для последующих кадров сначала обновляем, потом отображаем
             if frame > 0:
-                self.update_grid()
+                self.advance(steps_per_frame)
             
             # Обновляем изображение
-            im.set_array(self.grid)
+            im.set_array(self._display_array(max_display_size))
             
             # Получаем актуальную статистику
             stats = self.get_stats()
             
-            # Обновляем заголовок
-            title = f'Игра "Жизнь" с паттерном Blinker - Поколение: {stats["generation"]}'
-            ax.set_title(title, fontsize=14)
+            # Обновляем заголовок (в быстром режиме он вне области блиттинга)
+            if not fast:
+                title = f'Игра "Жизнь" с паттерном Blinker - Поколение: {stats["generation"]}'
+                ax.set_title(title, fontsize=14)
             
             # Обновляем текст статистики
             stats_str = (f'Поколение: {stats["generation"]}\n'
@@ -232,29 +1596,279 @@ class GameOfLife:
                         f'Размер сетки: {self.width}×{self.height}')
             stats_text.set_text(stats_str)
             
-            # Возвращаем только изображение
-            return [im]
+            return [im, stats_text] if fast else [im]
         
-        # Создание анимации (отключаем blit для корректного отображения текста)
-        ani = animation.FuncAnimation(fig, animate, frames=steps, 
-                                    interval=300, blit=False, repeat=False)
+        # В обычном режиме blit отключен для корректного отображения заголовка
+        # Кадр 0 - начальное состояние, всего кадров ceil(steps / steps_per_frame)
+        frames = -(-steps // steps_per_frame)
+        ani = animation.FuncAnimation(fig, animate, frames=frames, 
+                                    interval=interval, blit=fast, repeat=False)
         
         plt.tight_layout()
-        plt.show()
+        if save_to is not None:
+            # Запись кадров без окна
+            fps = max(1, round(1000 / interval))
+            if save_to.lower().endswith('.gif'):
+                writer = animation.PillowWriter(fps=fps)
+            else:
+                writer = animation.FFMpegWriter(fps=fps)
+            ani.save(save_to, writer=writer)
+            plt.close(fig)
+            if self.verbose:
+                print(f"Анимация сохранена в файл: {save_to}")
+        else:
+            plt.show()
         
         return ani
 
-    def save_pattern(self, filename):
-        """Сохранение текущего паттерна в файл"""
-        np.savetxt(filename, self.grid, fmt='%d')
-        print(f"Паттерн сохранен в файл: {filename}")
+    @staticmethod
+    def _pattern_format(filename, file_format):
+        """Формат файла: явно заданный или по расширению"""
+        if file_format is not None:
+            return file_format
+        extension = os.path.splitext(filename)[1].lower()
+        return {'.rle': 'rle', '.bin': 'binary'}.get(extension, 'text')
+    
+    def save_pattern(self, filename, file_format=None):
+        """
+        Сохранение текущего паттерна в файл
+        
+        Args:
+            filename: имя файла
+            file_format: 'text' (матрица 0/1), 'rle' или 'binary' (упакованный,
+                         с заголовком); по умолчанию определяется по расширению
+                         (.rle, .bin, иначе текст)
+        """
+        file_format = self._pattern_format(filename, file_format)
+        if file_format == 'rle':
+            write_rle(filename, self.grid, self.generation, self.seed, self.rule)
+        elif file_format == 'binary':
+            write_packed_binary(filename, self.grid, self.generation, self.seed)
+        elif self.engine == 'bitpacked':
+            # Потоковая запись полосами, без распаковки всей сетки
+            with open(filename, 'w') as f:
+                for band in self.grid.iter_dense_bands():
+                    np.savetxt(f, band, fmt='%d')
+        else:
+            np.savetxt(filename, self.grid, fmt='%d')
+        if self.verbose:
+            print(f"Паттерн сохранен в файл: {filename}")
     
-    def load_pattern(self, filename):
-        """Загрузка паттерна из файла"""
-        self.grid = np.loadtxt(filename, dtype=int)
+    def load_pattern(self, filename, file_format=None):
+        """
+        Загрузка паттерна из файла
+        
+        Форматы RLE и двоичный восстанавливают номер поколения и семя,
+        RLE - еще и правило (с окрестностью и границами). Правило проверяется
+        до замены сетки: при несовместимом с движком правиле состояние игры
+        не меняется.
+        """
+        file_format = self._pattern_format(filename, file_format)
+        packed = self.engine == 'bitpacked'
+        if file_format == 'rle':
+            grid, generation, seed, rule = read_rle(filename, packed)
+            if rule is not None:
+                self._set_rule(LifeRule.from_rle(rule))
+            self.grid, self.generation = grid, generation
+        elif file_format == 'binary':
+            self.grid, self.generation, seed = read_packed_binary(filename, packed)
+        else:
+            self.grid = np.loadtxt(filename, dtype=int)
+            if packed:
+                self.grid = BitPackedGrid.from_dense(self.grid)
+            self.generation = 0
+            seed = None
+        
+        if seed is not None:
+            self.seed = seed
         self.height, self.width = self.grid.shape
+        self.cycle_period = None
+        self.cycle_transient = None
+        if self.verbose:
+            print(f"Паттерн загружен из файла: {filename}")
+
+class GameOfLifeBatch:
+    """
+    Пакет из B независимых вселенных, хранящихся одним массивом (B, H, W)
+    
+    Все вселенные продвигаются одной векторизованной операцией, а
+    статистика возвращается векторами длины B. Используется для перебора
+    параметров на множестве небольших сеток.
+    """
+    
+    def __init__(self, batch_size, width=64, height=64, alive_probability=0.3, seed=None,
+                 rule='B3/S23'):
+        """
+        Args:
+            batch_size: число вселенных B
+            width, height: размер каждой сетки
+            alive_probability: вероятность живой клетки - число или вектор длины B
+            seed: семя собственного генератора np.random.Generator
+            rule: правило B/S - строка или LifeRule
+        """
+        self.batch_size = batch_size
+        self.rule = rule if isinstance(rule, LifeRule) else LifeRule(rule)
+        self.width = width
+        self.height = height
+        self.seed = seed
+        
+        rng = np.random.default_rng(seed)
+        probabilities = np.broadcast_to(np.asarray(alive_probability, dtype=float), (batch_size,))
+        self.alive_probability = probabilities.copy()
+        self.grids = (rng.random((batch_size, height, width))
+                      < probabilities[:, np.newaxis, np.newaxis]).astype(np.uint8)
+        
+        self.initial_grids = self.grids.copy()
+        self.generation = 0
+    
+    @classmethod
+    def from_grids(cls, grids, rule='B3/S23'):
+        """Пакет из готового массива сеток (B, H, W)"""
+        grids = np.asarray(grids, dtype=np.uint8)
+        batch = cls.__new__(cls)
+        batch.rule = rule if isinstance(rule, LifeRule) else LifeRule(rule)
+        batch.batch_size, batch.height, batch.width = grids.shape
+        batch.seed = None
+        batch.alive_probability = grids.mean(axis=(1, 2))
+        batch.grids = grids.copy()
+        batch.initial_grids = grids.copy()
+        batch.generation = 0
+        return batch
+    
+    def update_grid(self):
+        """Одно поколение для всех вселенных сразу"""
+        self.grids = self.rule.step(self.grids, dtype=np.uint8)
+        self.generation += 1
+    
+    def advance(self, n):
+        """Перемотка всех вселенных на n поколений"""
+        for _ in range(n):
+            self.update_grid()
+        return self.grids
+    
+    def get_stats(self):
+        """Статистика текущего поколения: векторы длины B"""
+        alive_cells = self.grids.sum(axis=(1, 2), dtype=np.int64)
+        total_cells = self.width * self.height
+        return {
+            'generation': self.generation,
+            'alive_cells': alive_cells,
+            'total_cells': total_cells,
+            'density': alive_cells / total_cells
+        }
+    
+    def reset(self):
+        """Сброс всех вселенных к начальному состоянию"""
+        self.grids = self.initial_grids.copy()
         self.generation = 0
-        print(f"Паттерн загружен из файла: {filename}")
+
+
+# ============ ПАКЕТНЫЙ ЗАПУСК АНСАМБЛЯ ============
+
+# Строка результата ансамбля: статистика одного поколения одного запуска
+ENSEMBLE_DTYPE = np.dtype([
+    ('seed', np.int64),
+    ('alive_probability', np.float64),
+    ('generation', np.int64),
+    ('alive_cells', np.int64),
+    ('density', np.float64),
+])
+
+
+def _run_ensemble_member(task):
+    """Один запуск ансамбля без печати; результат - (номер задачи, структурированный массив)"""
+    index, width, height, seed, alive_probability, steps, engine = task
+    rows = np.zeros(steps + 1, dtype=ENSEMBLE_DTYPE)
+    rows['seed'] = seed
+    rows['alive_probability'] = alive_probability
+    
+    with GameOfLife(width, height, alive_probability, seed=seed, engine=engine,
+                    rng=np.random.default_rng(seed), verbose=False) as game:
+        for generation in range(steps + 1):
+            if generation > 0:
+                game.update_grid()
+            stats = game.get_stats()
+            rows[generation]['generation'] = stats['generation']
+            rows[generation]['alive_cells'] = stats['alive_cells']
+            rows[generation]['density'] = stats['density']
+    return index, rows
+
+
+def run_ensemble(width, height, seeds, probabilities, steps=100, engine='vectorized',
+                 n_workers=None, output_dir=None):
+    """
+    Запуск ансамбля GameOfLife для всех пар (семя, вероятность) в пуле процессов
+    
+    У каждого запуска свой np.random.Generator, глобальное состояние
+    генераторов не используется, в цикле ничего не печатается.
+    
+    Args:
+        width, height: размер сетки
+        seeds: список семян
+        probabilities: список вероятностей живой клетки
+        steps: число поколений (в результат входит и поколение 0)
+        engine: движок расчета поколения; 'parallel' допустим только при
+                n_workers=1 - процессы пула демонические и не могут
+                запускать собственные процессы
+        n_workers: число процессов (1 - без пула, в текущем процессе)
+        output_dir: если задан, результат каждого запуска записывается
+                    отдельным файлом chunk_XXXXXX.npy по мере готовности
+                    (номер - позиция задачи, а не порядок завершения;
+                    части от прошлых запусков удаляются)
+    
+    Returns:
+        структурированный массив ENSEMBLE_DTYPE (если output_dir не задан),
+        иначе число записанных частей
+    """
+    pairs = [(seed, probability) for probability in probabilities for seed in seeds]
+    tasks = [(index, width, height, seed, probability, steps, engine)
+             for index, (seed, probability) in enumerate(pairs)]
+    n_workers = n_workers or os.cpu_count() or 1
+    if engine == 'parallel' and n_workers > 1:
+        raise ValueError("Движок 'parallel' в ансамбле возможен только при n_workers=1: "
+                         "процессы пула не могут запускать свои процессы")
+    
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+        # Старые части иначе смешались бы с новыми в load_ensemble
+        for name in os.listdir(output_dir):
+            if name.startswith('chunk_') and name.endswith('.npy'):
+                os.remove(os.path.join(output_dir, name))
+    
+    # Части приходят в порядке завершения, место каждой - по номеру задачи
+    chunks = [None] * len(tasks)
+    
+    def collect(index, rows):
+        if output_dir is None:
+            chunks[index] = rows
+        else:
+            np.save(os.path.join(output_dir, f"chunk_{index:06d}.npy"), rows)
+    
+    if n_workers == 1:
+        for task in tasks:
+            collect(*_run_ensemble_member(task))
+    else:
+        with multiprocessing.get_context().Pool(n_workers) as pool:
+            results = pool.imap_unordered(_run_ensemble_member, tasks,
+                                          chunksize=max(1, len(tasks) // (4 * n_workers)))
+            for index, rows in results:
+                collect(index, rows)
+    
+    if output_dir is not None:
+        return len(tasks)
+    if not chunks:
+        return np.zeros(0, dtype=ENSEMBLE_DTYPE)
+    return np.concatenate(chunks)
+
+
+def load_ensemble(output_dir):
+    """Сборка результата ансамбля из частей, записанных run_ensemble"""
+    names = sorted(name for name in os.listdir(output_dir)
+                   if name.startswith('chunk_') and name.endswith('.npy'))
+    if not names:
+        return np.zeros(0, dtype=ENSEMBLE_DTYPE)
+    return np.concatenate([np.load(os.path.join(output_dir, name)) for name in names])
+
 
 # Пример использования
 if __name__ == "__main__":
@@ -0,0 +1,324 @@
+"""
+Замеры масштабирования стратегий TSPSolver
+
+Каждая стратегия запускается на задачах растущего размера: случайных
+(равномерные точки с фиксированным семенем) и/или из файлов TSPLIB.
+Замеряются время, число раскрытых узлов (или итераций), пиковая память
+процесса (RSS) и отклонение от оптимума. Каждый замер выполняется в
+отдельном процессе: так пиковая память относится только к нему, а
+превысивший ограничение времени процесс просто завершается.
+
+Оптимум для задачи TSPLIB берется из файла .opt.tour рядом с .tsp или
+из --optimum ИМЯ=ДЛИНА (длины - в целочисленной метрике TSPLIB). Для
+случайных задач оптимумом считается результат точной стратегии этого
+же запуска (Хелд-Карп или доказанный метод ветвей и границ). Длины
+маршрутов bfs и dfs перед замерами сверяются с Хелдом-Карпом на малых
+случайных задачах.
+
+Пример:
+    python benchmark.py --sizes 8 12 200 2000 --strategies greedy local_search --output bench.json
+    python benchmark.py --tsplib berlin52.tsp --strategies lin_kernighan --time-cap 30
+"""
+import argparse
+import contextlib
+import json
+import math
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from lab7 import HELD_KARP_MAX_CITIES, TSPSolver, load_tsplib, read_tsplib_tour, tsplib_tour_length
+
+try:
+    import resource
+except ImportError:  # Windows: пиковая память не измеряется
+    resource = None
+
+DEFAULT_SIZES = [8, 10, 12, 16, 20, 50, 200, 1000, 5000]
+DEFAULT_STRATEGIES = ['bfs', 'dfs', 'astar', 'greedy', 'backward', 'held_karp', 'branch_and_bound',
+                      'local_search', 'lin_kernighan', 'multistart']
+# Метод решателя и ключ его статистики для каждой стратегии
+STRATEGY_METHODS = {
+    'bfs': 'bfs_search',
+    'dfs': 'dfs_search',
+    'astar': 'astar_search',
+    'greedy': 'greedy_search',
+    'backward': 'backward_search',
+    'held_karp': 'held_karp_search',
+    'branch_and_bound': 'branch_and_bound_search',
+    'local_search': 'local_search',
+    'lin_kernighan': 'lin_kernighan_search',
+    'multistart': 'multistart_search',
+}
+# Число городов, выше которого стратегия не запускается
+STRATEGY_MAX_CITIES = {
+    'bfs': 12,
+    'dfs': 12,
+    'astar': 10,
+    'backward': 300,
+    'held_karp': HELD_KARP_MAX_CITIES,
+    'branch_and_bound': 80,
+}
+# Стратегии с ограничением числа узлов и со своим ограничением времени
+NODE_CAPPED = ('bfs', 'dfs', 'astar')
+TIME_LIMITED = {
+    'branch_and_bound': 'time_limit',
+    'lin_kernighan': 'time_limit',
+    'multistart': 'time_budget',
+}
+# Размеры и число случайных задач для сверки точных переборов с Хелдом-Карпом
+CHECKED_STRATEGIES = ('bfs', 'dfs')
+CHECK_SIZES = range(3, 10)
+CHECK_INSTANCES = 5
+# Стратегии со своим лимитом получают search_time, но не больше этой доли
+# ограничения времени замера
+TIME_LIMIT_SHARE = 0.8
+
+
+def peak_rss_mb():
+    """Пиковая память текущего процесса в МБ (None, если недоступно)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux возвращает КБ, macOS - байты
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def random_instance(n, seed):
+    """Случайная задача: n равномерных точек в квадрате 1000 x 1000"""
+    return np.random.default_rng([seed, n]).random((n, 2)) * 1000
+
+
+def check_against_held_karp(strategy, seed):
+    """Совпадают ли длины маршрутов стратегии с Хелдом-Карпом на малых задачах"""
+    for n in CHECK_SIZES:
+        for k in range(CHECK_INSTANCES):
+            solver = TSPSolver(random_instance(n, seed + k))
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                _, exact = solver.held_karp_search()
+                _, length = getattr(solver, STRATEGY_METHODS[strategy])()
+            if not math.isclose(length, exact, rel_tol=1e-9):
+                return False
+    return True
+
+
+def instance_coords(instance):
+    """Координаты городов задачи (случайной или из файла TSPLIB)"""
+    if instance['kind'] == 'tsplib':
+        return load_tsplib(instance['file'])[0]
+    return random_instance(instance['size'], instance['seed'])
+
+
+def _measure(instance, strategy, node_cap, time_cap, search_time, queue):
+    """Замер одной стратегии на одной задаче (выполняется в отдельном процессе)"""
+    solver = TSPSolver(instance_coords(instance))
+    kwargs = {}
+    if strategy in NODE_CAPPED:
+        kwargs['max_nodes'] = node_cap
+    if strategy in TIME_LIMITED:
+        kwargs[TIME_LIMITED[strategy]] = min(search_time, time_cap * TIME_LIMIT_SHARE)
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start_time = time.perf_counter()
+        path, length = getattr(solver, STRATEGY_METHODS[strategy])(**kwargs)
+        elapsed = time.perf_counter() - start_time
+
+    stats = solver.stats[strategy]
+    nodes = stats.get('nodes_visited', stats.get('iterations'))
+    queue.put({
+        'seconds': elapsed,
+        'nodes': nodes,
+        'node_cap_reached': strategy in NODE_CAPPED and nodes >= node_cap,
+        'proven_optimal': strategy == 'held_karp' or bool(stats.get('proven_optimal', False)),
+        'peak_rss_mb': peak_rss_mb(),
+        'path_length': float(length) if path is not None else None,
+        'tsplib_length': (tsplib_tour_length(solver.coords, path, instance['edge_weight_type'])
+                          if path is not None and instance['kind'] == 'tsplib' else None),
+    })
+
+
+def run_case(instance, strategy, node_cap, time_cap, search_time, context):
+    """Замер в отдельном процессе; (результат, причина пропуска)"""
+    queue = context.Queue()
+    process = context.Process(target=_measure,
+                              args=(instance, strategy, node_cap, time_cap, search_time, queue))
+    process.start()
+    process.join(time_cap)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return None, 'превышено ограничение времени'
+    if process.exitcode != 0 or queue.empty():
+        return None, 'ошибка процесса замера'
+    return queue.get(), None
+
+
+def make_instances(sizes, tsplib_files, optima, seed):
+    """Описания задач: случайные размеров sizes и файлы TSPLIB"""
+    instances = [{'kind': 'random', 'name': f'random{size}', 'size': size, 'seed': seed,
+                  'optimum': None}
+                 for size in sizes]
+    for filename in tsplib_files:
+        coords, header = load_tsplib(filename)
+        name = header.get('NAME', os.path.splitext(os.path.basename(filename))[0])
+        edge_weight_type = header.get('EDGE_WEIGHT_TYPE', 'EUC_2D')
+        optimum = optima.get(name)
+        tour_file = os.path.splitext(filename)[0] + '.opt.tour'
+        if optimum is None and os.path.exists(tour_file):
+            optimum = tsplib_tour_length(coords, read_tsplib_tour(tour_file), edge_weight_type)
+        instances.append({'kind': 'tsplib', 'name': name, 'file': os.path.abspath(filename),
+                          'size': len(coords), 'edge_weight_type': edge_weight_type,
+                          'optimum': optimum})
+    return instances
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, strategies=DEFAULT_STRATEGIES, tsplib_files=(), optima=None,
+                   seed=2024, node_cap=200000, time_cap=60.0, search_time=10.0, check=True):
+    """
+    Запуск всех замеров
+
+    Returns:
+        словарь с описанием окружения ('meta') и списком результатов ('results')
+    """
+    context = multiprocessing.get_context('spawn')
+    results = []
+    correctness = {}
+
+    if check:
+        for strategy in strategies:
+            if strategy in CHECKED_STRATEGIES:
+                correctness[strategy] = check_against_held_karp(strategy, seed)
+
+    for instance in make_instances(sizes, tsplib_files, optima or {}, seed):
+        rows = []
+        for strategy in strategies:
+            row = {
+                'instance': instance['name'],
+                'size': instance['size'],
+                'strategy': strategy,
+                'matches_held_karp': correctness.get(strategy),
+            }
+            if instance['size'] > STRATEGY_MAX_CITIES.get(strategy, float('inf')):
+                row['skipped'] = 'размер больше STRATEGY_MAX_CITIES'
+            else:
+                measured, reason = run_case(instance, strategy, node_cap, time_cap, search_time, context)
+                if measured is None:
+                    row['skipped'] = reason
+                else:
+                    row.update(measured)
+            rows.append(row)
+
+        add_gaps(instance, rows)
+        for row in rows:
+            print_row(row)
+        results.extend(rows)
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'seed': seed,
+            'node_cap': node_cap,
+            'time_cap': time_cap,
+            'search_time': search_time,
+        },
+        'results': results,
+    }
+
+
+def add_gaps(instance, rows):
+    """Отклонение от оптимума, % (оптимум TSPLIB или точный результат этого запуска)"""
+    key = 'tsplib_length' if instance['kind'] == 'tsplib' else 'path_length'
+    optimum = instance['optimum']
+    if optimum is None:
+        exact = [row[key] for row in rows if row.get('proven_optimal') and row.get(key) is not None]
+        optimum = min(exact) if exact else None
+    for row in rows:
+        row['optimum'] = optimum
+        if optimum and row.get(key) is not None:
+            row['gap_percent'] = 100.0 * (row[key] - optimum) / optimum
+        else:
+            row['gap_percent'] = None
+
+
+def print_row(row):
+    """Строка таблицы результатов"""
+    prefix = f"{row['instance']:<14} {row['strategy']:<18}"
+    if 'skipped' in row:
+        print(f"{prefix} пропущено: {row['skipped']}")
+        return
+    rss = f"{row['peak_rss_mb']:9.1f} МБ" if row['peak_rss_mb'] is not None else '        -'
+    length = f"{row['path_length']:14.2f}" if row['path_length'] is not None else f"{'-':>14}"
+    gap = f"{row['gap_percent']:8.2f}%" if row['gap_percent'] is not None else f"{'-':>9}"
+    nodes = f"{row['nodes']}" + (' (предел)' if row['node_cap_reached'] else '')
+    check = {True: '✓', False: '✗', None: '-'}[row['matches_held_karp']]
+    print(f"{prefix} {row['seconds']:10.4f} с  узлов: {nodes:<18} {rss} длина: {length} "
+          f"отклонение: {gap}  Хелд-Карп: {check}")
+
+
+def print_comparison(report):
+    """Сравнительная таблица: время стратегий (с) для каждой задачи"""
+    strategies = list(dict.fromkeys(row['strategy'] for row in report['results']))
+    width = 22 + 14 * len(strategies)
+    print("\n" + "=" * width)
+    print(f"{'Задача':<14} {'Городов':>7}" + ''.join(f"{strategy[:13]:>14}" for strategy in strategies))
+    print("-" * width)
+
+    table = {(row['instance'], row['strategy']): row.get('seconds') for row in report['results']}
+    sizes = {row['instance']: row['size'] for row in report['results']}
+    for instance, size in sizes.items():
+        cells = ''.join(f"{table[(instance, strategy)]:>14.4f}" if table.get((instance, strategy)) is not None
+                        else f"{'-':>14}" for strategy in strategies)
+        print(f"{instance:<14} {size:>7}{cells}")
+    print("=" * width)
+
+
+def parse_optima(values):
+    """Разбор --optimum ИМЯ=ДЛИНА"""
+    optima = {}
+    for value in values:
+        name, sep, length = value.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Ожидается ИМЯ=ДЛИНА, получено: {value}")
+        optima[name] = float(length)
+    return optima
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры масштабирования стратегий задачи коммивояжёра")
+    parser.add_argument('--sizes', type=int, nargs='*', default=DEFAULT_SIZES,
+                        help="размеры случайных задач")
+    parser.add_argument('--tsplib', nargs='*', default=[], help="файлы задач TSPLIB (.tsp)")
+    parser.add_argument('--optimum', nargs='*', default=[], help="известные оптимумы: ИМЯ=ДЛИНА")
+    parser.add_argument('--strategies', nargs='+', default=DEFAULT_STRATEGIES, choices=list(STRATEGY_METHODS))
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--node-cap', type=int, default=200000, help="предел узлов для bfs/dfs/astar")
+    parser.add_argument('--time-cap', type=float, default=60.0, help="предел времени на замер, с")
+    parser.add_argument('--search-time', type=float, default=10.0,
+                        help="время для стратегий со своим лимитом (ветви и границы, LK, мультистарт), с")
+    parser.add_argument('--no-check', action='store_true', help="не сверять bfs/dfs с Хелдом-Карпом")
+    parser.add_argument('--output', help="файл JSON (по умолчанию - вывод в консоль)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.sizes, args.strategies, args.tsplib, parse_optima(args.optimum),
+                            args.seed, args.node_cap, args.time_cap, args.search_time,
+                            check=not args.no_check)
+    print_comparison(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Результаты сохранены в файл: {args.output}")
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,383 @@
 import math
+import multiprocessing
+import os
 import time
-from collections import deque
+from collections import OrderedDict, deque
 from itertools import permutations
 import heapq
+from multiprocessing import shared_memory
+from queue import Empty, Queue
+
+import numpy as np
+
+# Число городов, начиная с которого матрица расстояний не хранится целиком
+# (5000 городов - это уже 200 МБ в float64)
+DENSE_MATRIX_LIMIT = 5000
+# Строк плотной матрицы за один проход (временные массивы - блок x n)
+DENSE_BLOCK_ROWS = 256
+# Максимум городов для точного ДП Хелда-Карпа (22 города - около 400 МБ)
+HELD_KARP_MAX_CITIES = 22
+# Максимум записей в таблице посещённых состояний BFS/DFS
+MAX_TABLE_SIZE = 1_000_000
+
+
+class LazyDistanceMatrix:
+    """
+    Матрица расстояний, вычисляемая по запросу из координат
+    
+    Поддерживает те же обращения, что и обычный массив: [i, j] - одно
+    расстояние, [i] - строка (последние запрошенные строки кешируются),
+    [массив, массив] - расстояния для пар городов.
+    """
+    
+    def __init__(self, coords, cache_rows=64):
+        self.coords = coords
+        self.shape = (len(coords), len(coords))
+        self.cache_rows = cache_rows
+        self._rows = OrderedDict()
+    
+    def __len__(self):
+        return self.shape[0]
+    
+    def row(self, i):
+        """Расстояния от города i до всех городов"""
+        row = self._rows.get(i)
+        if row is None:
+            diff = self.coords - self.coords[i]
+            row = np.sqrt(diff[:, 0] * diff[:, 0] + diff[:, 1] * diff[:, 1])
+            self._rows[i] = row
+            if len(self._rows) > self.cache_rows:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(i)
+        return row
+    
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            return self.row(key)
+        i, j = key
+        if np.isscalar(i) and np.isscalar(j):
+            dx = self.coords[i, 0] - self.coords[j, 0]
+            dy = self.coords[i, 1] - self.coords[j, 1]
+            return math.sqrt(dx * dx + dy * dy)
+        diff = self.coords[i] - self.coords[j]
+        return np.sqrt(diff[..., 0] * diff[..., 0] + diff[..., 1] * diff[..., 1])
+
+
+class KDTreeIndex:
+    """
+    KD-дерево для поиска ближайшего города с удалением
+    
+    Дерево строится один раз делением по медиане вдоль более длинной
+    стороны прямоугольника; в узлах хранится число ещё не удалённых
+    городов, поэтому опустевшие ветви при поиске не просматриваются.
+    Поиск и удаление - O(log n) в среднем, матрица расстояний не нужна.
+    """
+    
+    LEAF_SIZE = 8
+    
+    def __init__(self, coords, leaf_size=LEAF_SIZE):
+        self.xs = coords[:, 0].tolist()
+        self.ys = coords[:, 1].tolist()
+        self.size = len(coords)
+        self.leaf_size = leaf_size
+        # Узлы дерева - в параллельных списках
+        self.boxes = []      # (x_min, y_min, x_max, y_max)
+        self.children = []   # (левый, правый) или None для листа
+        self.splits = []     # (ось, значение) деления
+        self.counts = []     # число неудалённых городов в поддереве
+        self.parents = []
+        self.cities = []     # города листа
+        self.leaf_of = [0] * self.size
+        if self.size:
+            self._build(coords, np.arange(self.size), -1)
+    
+    def _build(self, coords, idx, parent):
+        node = len(self.counts)
+        points = coords[idx]
+        lo, hi = points.min(axis=0), points.max(axis=0)
+        self.boxes.append((float(lo[0]), float(lo[1]), float(hi[0]), float(hi[1])))
+        self.counts.append(len(idx))
+        self.parents.append(parent)
+        self.children.append(None)
+        self.splits.append(None)
+        self.cities.append(None)
+        
+        if len(idx) <= self.leaf_size:
+            self.cities[node] = idx.tolist()
+            for city in self.cities[node]:
+                self.leaf_of[city] = node
+            return node
+        
+        axis = int(np.argmax(hi - lo))
+        mid = len(idx) // 2
+        order = np.argpartition(points[:, axis], mid)
+        self.splits[node] = (axis, float(points[order[mid], axis]))
+        idx = idx[order]
+        left = self._build(coords, idx[:mid], node)
+        right = self._build(coords, idx[mid:], node)
+        self.children[node] = (left, right)
+        return node
+    
+    def __len__(self):
+        return self.size
+    
+    def remove(self, city):
+        """Удалить город из индекса"""
+        node = self.leaf_of[city]
+        self.cities[node].remove(city)
+        while node >= 0:
+            self.counts[node] -= 1
+            node = self.parents[node]
+        self.size -= 1
+    
+    def nearest(self, x, y):
+        """Ближайший к точке (x, y) город (при равенстве - с меньшим номером), -1 если пусто"""
+        xs, ys = self.xs, self.ys
+        best, best_sq = -1, math.inf
+        stack = [0] if self.size else []
+        
+        while stack:
+            node = stack.pop()
+            if not self.counts[node]:
+                continue
+            x_min, y_min, x_max, y_max = self.boxes[node]
+            dx = x_min - x if x < x_min else (x - x_max if x > x_max else 0.0)
+            dy = y_min - y if y < y_min else (y - y_max if y > y_max else 0.0)
+            if dx * dx + dy * dy > best_sq:
+                continue
+            
+            kids = self.children[node]
+            if kids is None:
+                for city in self.cities[node]:
+                    dx = xs[city] - x
+                    dy = ys[city] - y
+                    sq = dx * dx + dy * dy
+                    if sq < best_sq or (sq == best_sq and city < best):
+                        best, best_sq = city, sq
+                continue
+            
+            # Ближняя к точке половина просматривается первой
+            axis, value = self.splits[node]
+            if (x if axis == 0 else y) < value:
+                stack.append(kids[1])
+                stack.append(kids[0])
+            else:
+                stack.append(kids[0])
+                stack.append(kids[1])
+        
+        return best
+
+
+class _ArrayTour:
+    """
+    Маршрут-цикл: массив городов и массив позиций городов в нём
+    
+    Соседи города по маршруту находятся за O(1). Обмен двух рёбер (2-opt)
+    разворачивает более короткую из двух дуг цикла, поэтому направление
+    обхода после хода может смениться - ходы задаются рёбрами, а не
+    позициями.
+    """
+    
+    def __init__(self, path):
+        self.order = [int(city) for city in path]
+        self.n = len(self.order)
+        self.pos = [0] * self.n
+        for i, city in enumerate(self.order):
+            self.pos[city] = i
+    
+    def next(self, city):
+        i = self.pos[city] + 1
+        return self.order[i if i < self.n else 0]
+    
+    def prev(self, city):
+        return self.order[self.pos[city] - 1]
+    
+    def reverse(self, i, j):
+        """Развернуть участок маршрута с позиции i по позицию j (по циклу)"""
+        n = self.n
+        inner = (j - i) % n + 1
+        if 2 * inner > n:
+            # Развернуть дополнение - получится тот же цикл
+            i, j = (j + 1) % n, (i - 1) % n
+            inner = n - inner
+        order, pos = self.order, self.pos
+        for _ in range(inner // 2):
+            a, b = order[i], order[j]
+            order[i], order[j] = b, a
+            pos[a], pos[b] = j, i
+            i = i + 1 if i + 1 < n else 0
+            j = j - 1 if j > 0 else n - 1
+    
+    def move(self, a, b, c, d):
+        """
+        2-opt: заменить рёбра (a, b) и (c, d) на (a, c) и (b, d)
+        (b и d лежат по одну сторону от a и c при обходе)
+        """
+        if self.next(a) == b:
+            self.reverse(self.pos[b], self.pos[c])
+        else:
+            self.reverse(self.pos[a], self.pos[d])
+    
+    def or_move(self, p, s1, s2, q, c, d, keep_orientation):
+        """
+        Or-opt: участок s1..s2 между p и q перенести между соседними c и d
+        (порядок обхода p s1..s2 q ... c d); без keep_orientation участок
+        вставляется развёрнутым (s2 рядом с c). Ход - два или три 2-opt.
+        """
+        self.move(p, s1, c, d)
+        if c != q:
+            self.move(p, c, q, s2)
+        if keep_orientation and s1 != s2:
+            self.move(c, s2, s1, d)
+    
+    def double_bridge(self, rng, span=None):
+        """
+        Случайный ход double-bridge: A B C D -> A C B D (не сводится
+        к 2-opt и Or-opt); span - наибольшее расстояние между разрезами
+        в позициях (None - по всему маршруту). Возвращает концы
+        удалённых рёбер: (a, b), (c, d), (e, f) -> (a, d), (e, b), (c, f)
+        """
+        n = self.n
+        if n < 8:
+            return []
+        if span is None or span + 2 >= n:
+            i, j, k = sorted(rng.choice(np.arange(1, n), size=3, replace=False).tolist())
+        else:
+            base = int(rng.integers(0, n - span - 1))
+            i, j, k = sorted((base + rng.choice(np.arange(1, span + 1), size=3, replace=False)).tolist())
+        order = self.order
+        ends = [order[i - 1], order[i], order[j - 1], order[j], order[k - 1], order[k % n]]
+        self.order = order[:i] + order[j:k] + order[i:j] + order[k:]
+        for p in range(i, k):
+            self.pos[self.order[p]] = p
+        return ends
+    
+    def to_path(self, start_city):
+        """Маршрут из start_city с возвратом в него"""
+        i = self.pos[start_city]
+        return self.order[i:] + self.order[:i] + [start_city]
+
+
+class _NodePool:
+    """
+    Узлы дерева поиска в массивах NumPy: родитель, последний город,
+    маска посещённых городов и длина пути
+    
+    Сам путь в узле не хранится - он восстанавливается по ссылкам на
+    родителей только для итогового маршрута. Массивы растут удвоением.
+    Пул может служить и стеком (pop снимает последний узел), тогда в нём
+    лежат только узлы текущей ветви и их ещё не раскрытые братья.
+    
+    У каждого узла считается число живых потомков. release освобождает
+    обработанный узел без потомков и по цепочке - ставших пустыми
+    предков; их места переиспользуются в add. Так в BFS в пуле остаются
+    только фронт очереди и предки его узлов, а не все раскрытые узлы.
+    """
+    
+    def __init__(self, capacity=1024):
+        self.parent = np.empty(capacity, dtype=np.int64)
+        self.city = np.empty(capacity, dtype=np.int32)
+        self.mask = np.empty(capacity, dtype=np.uint64)
+        self.length = np.empty(capacity, dtype=np.float64)
+        self.expanded = np.empty(capacity, dtype=bool)
+        self.children = np.empty(capacity, dtype=np.int32)
+        self.size = 0
+        self.live = 0
+        self._free = []
+    
+    def add(self, parent, city, mask, length):
+        """Новый узел (на освобождённом месте, если есть); возвращает его номер"""
+        if self._free:
+            node = self._free.pop()
+        else:
+            if self.size == len(self.parent):
+                for name in ('parent', 'city', 'mask', 'length', 'expanded', 'children'):
+                    old = getattr(self, name)
+                    grown = np.empty(2 * len(old), dtype=old.dtype)
+                    grown[:len(old)] = old
+                    setattr(self, name, grown)
+            node = self.size
+            self.size += 1
+        self.parent[node] = parent
+        self.city[node] = city
+        self.mask[node] = mask
+        self.length[node] = length
+        self.expanded[node] = False
+        self.children[node] = 0
+        if parent >= 0:
+            self.children[parent] += 1
+        self.live += 1
+        return node
+    
+    def pop(self):
+        """Снять последний узел"""
+        self.size -= 1
+        self.live -= 1
+        parent = int(self.parent[self.size])
+        if parent >= 0:
+            self.children[parent] -= 1
+    
+    def release(self, node):
+        """Освободить обработанный узел без потомков и опустевших предков"""
+        while node >= 0 and self.children[node] == 0:
+            parent = int(self.parent[node])
+            self._free.append(node)
+            self.live -= 1
+            if parent >= 0:
+                self.children[parent] -= 1
+            node = parent
+    
+    def path(self, node):
+        """Путь от корня до узла"""
+        path = []
+        while node >= 0:
+            path.append(int(self.city[node]))
+            node = int(self.parent[node])
+        path.reverse()
+        return path
+
 
 class TSPSolver:
     
-    def __init__(self, cities):
+    def __init__(self, cities, lazy=None, dist_matrix=None):
         """
-        cities: список кортежей (x, y) - координаты городов
+        cities: список кортежей (x, y) - координаты городов (или массив n x 2)
+        lazy: вычислять расстояния по запросу вместо полной матрицы
+              (по умолчанию - если городов больше DENSE_MATRIX_LIMIT)
+        dist_matrix: готовая матрица расстояний (например, в общей памяти)
         """
         self.cities = cities
-        self.n = len(cities)
-        self.dist_matrix = self._create_distance_matrix()
+        self.coords = np.asarray(cities, dtype=float).reshape(-1, 2)
+        self.n = len(self.coords)
+        if dist_matrix is not None:
+            self.lazy = False
+            self.dist_matrix = dist_matrix
+        else:
+            self.lazy = self.n > DENSE_MATRIX_LIMIT if lazy is None else lazy
+            self.dist_matrix = self._create_distance_matrix()
         self.stats = {}
+        # Кеш списков ближайших соседей: {k: массив n x k}
+        self._neighbors = {}
         
     def _create_distance_matrix(self):
-        """Создание матрицы расстояний между городами"""
-        matrix = [[0.0] * self.n for _ in range(self.n)]
-        for i in range(self.n):
-            for j in range(self.n):
-                if i != j:
-                    dx = self.cities[i][0] - self.cities[j][0]
-                    dy = self.cities[i][1] - self.cities[j][1]
-                    matrix[i][j] = math.sqrt(dx * dx + dy * dy)
+        """Создание матрицы расстояний между городами (массив float64)"""
+        if self.lazy:
+            return LazyDistanceMatrix(self.coords)
+        x = self.coords[:, 0]
+        y = self.coords[:, 1]
+        matrix = np.empty((self.n, self.n))
+        # Блоками строк прямо в матрицу: без временных массивов n x n
+        for start in range(0, self.n, DENSE_BLOCK_ROWS):
+            stop = min(start + DENSE_BLOCK_ROWS, self.n)
+            np.hypot(x[start:stop, np.newaxis] - x, y[start:stop, np.newaxis] - y,
+                     out=matrix[start:stop])
         return matrix
     
     def _calculate_path_length(self, path):
-        """Вычисление длины маршрута"""
-        length = 0
-        for i in range(len(path) - 1):
-            length += self.dist_matrix[path[i]][path[i + 1]]
-        # Возврат в начальный город
-        length += self.dist_matrix[path[-1]][path[0]]
-        return length
+        """Вычисление длины маршрута (с возвратом в начальный город)"""
+        path = np.asarray(path)
+        return float(self.dist_matrix[path, np.roll(path, -1)].sum())
     
     def _is_complete_path(self, path):
         """Проверка, что посещены все города"""
@@ -44,57 +388,109 @@ class TSPSolver:
         visited = set(path)
         return [i for i in range(self.n) if i not in visited]
     
+    def _check_state_mask(self):
+        """Маска посещённых городов в _NodePool - 64 бита"""
+        if self.n > 64:
+            raise ValueError(f"Поиск по состояниям поддерживает не более 64 городов (задано {self.n})")
+    
+    @staticmethod
+    def _format_path(path, limit=40):
+        """Путь для вывода (длинные маршруты сокращаются)"""
+        if len(path) <= limit:
+            return str(path)
+        return f"[{', '.join(map(str, path[:limit // 2]))}, ..., {', '.join(map(str, path[-limit // 2:]))}] ({len(path) - 1} городов)"
+    
     # ============ СТРАТЕГИЯ 1: ПОИСК В ШИРИНУ (BFS) ============
-    def bfs_search(self, start_city=0):
+    def bfs_search(self, start_city=0, max_nodes=None, max_table_size=MAX_TABLE_SIZE):
         """
         Поиск в ширину (BFS) для задачи коммивояжёра
         
-        Состояние: кортеж посещённых городов
-        Начальное состояние: (start_city,)
+        Состояние: набор посещённых городов (битовая маска) и последний город
+        Начальное состояние: {start_city}
         Целевое состояние: любой путь длины n, включающий все города
+        max_nodes: ограничение числа раскрытых узлов (None - без ограничения)
+        max_table_size: максимум записей в таблице состояний
+        
+        Узлы хранятся в _NodePool (маска, город, ссылка на родителя), в
+        очереди - только номера узлов. Обработанные узлы без потомков в
+        очереди освобождаются (release), поэтому пул держит фронт и
+        предков его узлов, а не все раскрытые узлы. Таблица хранит лучшую длину пути
+        для каждого состояния (маска, последний город), как в astar_search:
+        состояние открывается заново только более коротким путём. Таблица
+        ограничена max_table_size записями, при переполнении вытесняются
+        самые старые (в BFS это состояния прошлых слоёв, которые уже не
+        встретятся).
         """
         print("\n=== ПОИСК В ШИРИНУ (BFS) ===")
+        self._check_state_mask()
         start_time = time.time()
         
-        # Очередь: [(путь, длина_пути)]
-        queue = deque([([start_city], 0)])
-        visited_states = set()
-        visited_states.add((start_city,))
+        # Очередь: номера узлов пула
+        pool = _NodePool()
+        start_mask = 1 << start_city
+        queue = deque([pool.add(-1, start_city, start_mask, 0.0)])
+        # (маска, последний город) -> лучшая известная длина пути
+        visited_states = OrderedDict([((start_mask, start_city), 0.0)])
+        full_mask = (1 << self.n) - 1
+        evictions = 0
         
         nodes_visited = 0
-        best_path = None
+        best_node = None
         best_length = float('inf')
         
-        while queue:
-            current_path, current_length = queue.popleft()
+        while queue and (max_nodes is None or nodes_visited < max_nodes):
+            node = queue.popleft()
             nodes_visited += 1
+            mask = int(pool.mask[node])
+            last_city = int(pool.city[node])
+            current_length = float(pool.length[node])
+            
+            # Пропуск, если к этому состоянию позже нашёлся более короткий путь
+            if visited_states.get((mask, last_city), current_length) < current_length:
+                pool.release(node)
+                continue
             
             # Проверка целевого состояния
-            if self._is_complete_path(current_path):
-                total_length = current_length + self.dist_matrix[current_path[-1]][start_city]
+            if mask == full_mask:
+                total_length = current_length + self.dist_matrix[last_city, start_city]
                 if total_length < best_length:
                     best_length = total_length
-                    best_path = current_path + [start_city]
+                    # Прежний лучший узел больше не нужен
+                    if best_node is not None:
+                        pool.release(best_node)
+                    best_node = node
+                else:
+                    pool.release(node)
                 continue
             
             # Генерация новых состояний
-            unvisited = self._get_unvisited_cities(current_path)
-            for next_city in unvisited:
-                new_path = current_path + [next_city]
-                state_tuple = tuple(sorted(new_path))
-                
-                if state_tuple not in visited_states:
-                    visited_states.add(state_tuple)
-                    new_length = current_length + self.dist_matrix[current_path[-1]][next_city]
-                    queue.append((new_path, new_length))
+            for next_city in range(self.n):
+                new_mask = mask | (1 << next_city)
+                if new_mask == mask:
+                    continue
+                new_length = current_length + self.dist_matrix[last_city, next_city]
+                state = (new_mask, next_city)
+                known_length = visited_states.get(state)
+                if known_length is not None and known_length <= new_length:
+                    continue
+                visited_states[state] = new_length
+                if known_length is None and len(visited_states) > max_table_size:
+                    visited_states.popitem(last=False)
+                    evictions += 1
+                queue.append(pool.add(node, next_city, new_mask, new_length))
+            # Узел без новых потомков уже не понадобится для восстановления пути
+            pool.release(node)
         
+        best_path = pool.path(best_node) + [start_city] if best_node is not None else None
         end_time = time.time()
         
         self.stats['bfs'] = {
             'time': end_time - start_time,
             'nodes_visited': nodes_visited,
             'path_length': best_length,
-            'path': best_path
+            'path': best_path,
+            'pool_nodes': pool.size,
+            'table_evictions': evictions
         }
         
         print(f"Лучший путь: {best_path}")
@@ -105,44 +501,79 @@ class TSPSolver:
         return best_path, best_length
     
     # ============ СТРАТЕГИЯ 1: ПОИСК В ГЛУБИНУ (DFS) ============
-    def dfs_search(self, start_city=0):
+    def dfs_search(self, start_city=0, max_nodes=None, max_table_size=MAX_TABLE_SIZE):
         """
         Поиск в глубину (DFS) для задачи коммивояжёра
+        
+        max_nodes: ограничение числа раскрытых узлов (None - без ограничения)
+        max_table_size: максимум записей в таблице состояний
+        
+        Состояния и таблица лучших длин те же, что в bfs_search, но стеком
+        служит сам _NodePool: раскрытый узел остаётся в пуле под своими
+        потомками и снимается, когда они закончатся, поэтому в памяти -
+        O(n^2) узлов. Путь восстанавливается только при нахождении лучшего
+        маршрута. При переполнении таблицы вытесняются самые старые записи
+        (такие состояния могут быть раскрыты повторно).
         """
         print("\n=== ПОИСК В ГЛУБИНУ (DFS) ===")
+        self._check_state_mask()
         start_time = time.time()
         
-        # Стек: [(путь, длина_пути)]
-        stack = [([start_city], 0)]
-        visited_states = set()
+        # Стек: узлы пула от корня до вершины
+        pool = _NodePool()
+        pool.add(-1, start_city, 1 << start_city, 0.0)
+        visited_states = OrderedDict()
+        full_mask = (1 << self.n) - 1
+        evictions = 0
+        max_pool_size = 1
         
         nodes_visited = 0
         best_path = None
         best_length = float('inf')
         
-        while stack:
-            current_path, current_length = stack.pop()
+        while pool.size and (max_nodes is None or nodes_visited < max_nodes):
+            node = pool.size - 1
+            if pool.expanded[node]:
+                # Все потомки узла уже сняты со стека
+                pool.pop()
+                continue
             nodes_visited += 1
+            mask = int(pool.mask[node])
+            last_city = int(pool.city[node])
+            current_length = float(pool.length[node])
             
-            state_tuple = tuple(sorted(current_path))
-            if state_tuple in visited_states:
+            # Состояние раскрывается заново только более коротким путём
+            state = (mask, last_city)
+            known_length = visited_states.get(state)
+            if known_length is not None and known_length <= current_length:
+                pool.pop()
                 continue
-            visited_states.add(state_tuple)
+            visited_states[state] = current_length
+            if known_length is None and len(visited_states) > max_table_size:
+                visited_states.popitem(last=False)
+                evictions += 1
             
             # Проверка целевого состояния
-            if self._is_complete_path(current_path):
-                total_length = current_length + self.dist_matrix[current_path[-1]][start_city]
+            if mask == full_mask:
+                total_length = current_length + self.dist_matrix[last_city, start_city]
                 if total_length < best_length:
                     best_length = total_length
-                    best_path = current_path + [start_city]
+                    best_path = pool.path(node) + [start_city]
+                pool.pop()
                 continue
             
             # Генерация новых состояний (в обратном порядке для правильного DFS)
-            unvisited = self._get_unvisited_cities(current_path)
-            for next_city in reversed(unvisited):
-                new_path = current_path + [next_city]
-                new_length = current_length + self.dist_matrix[current_path[-1]][next_city]
-                stack.append((new_path, new_length))
+            pool.expanded[node] = True
+            for next_city in range(self.n - 1, -1, -1):
+                new_mask = mask | (1 << next_city)
+                if new_mask == mask:
+                    continue
+                new_length = current_length + self.dist_matrix[last_city, next_city]
+                known_length = visited_states.get((new_mask, next_city))
+                if known_length is not None and known_length <= new_length:
+                    continue
+                pool.add(node, next_city, new_mask, new_length)
+            max_pool_size = max(max_pool_size, pool.size)
         
         end_time = time.time()
         
@@ -150,7 +581,9 @@ class TSPSolver:
             'time': end_time - start_time,
             'nodes_visited': nodes_visited,
             'path_length': best_length,
-            'path': best_path
+            'path': best_path,
+            'pool_nodes': max_pool_size,
+            'table_evictions': evictions
         }
         
         print(f"Лучший путь: {best_path}")
@@ -173,7 +606,7 @@ class TSPSolver:
         remaining = list(unvisited)
         
         # Расстояние от текущего города до ближайшего непосещённого
-        min_dist = min(self.dist_matrix[current_city][city] for city in remaining)
+        min_dist = min(self.dist_matrix[current_city, city] for city in remaining)
         total += min_dist
         
         # Примерная оценка оставшегося пути
@@ -181,19 +614,20 @@ class TSPSolver:
             min_edge = float('inf')
             for i in range(len(remaining)):
                 for j in range(i + 1, len(remaining)):
-                    min_edge = min(min_edge, self.dist_matrix[remaining[i]][remaining[j]])
+                    min_edge = min(min_edge, self.dist_matrix[remaining[i], remaining[j]])
             total += min_edge
             remaining.pop()
         
         return total
     
     # ============ СТРАТЕГИЯ 2: A* ПОИСК ============
-    def astar_search(self, start_city=0):
+    def astar_search(self, start_city=0, max_nodes=None):
         """
         A* поиск для задачи коммивояжёра
         f(n) = g(n) + h(n)
         g(n) - стоимость пути от начала
         h(n) - эвристическая оценка до цели
+        max_nodes: ограничение числа раскрытых узлов (None - без ограничения)
         """
         print("\n=== A* ПОИСК ===")
         start_time = time.time()
@@ -206,7 +640,7 @@ class TSPSolver:
         best_path = None
         best_length = float('inf')
         
-        while heap:
+        while heap and (max_nodes is None or nodes_visited < max_nodes):
             f_score, g_score, current_path = heapq.heappop(heap)
             nodes_visited += 1
             
@@ -219,7 +653,7 @@ class TSPSolver:
             
             # Проверка целевого состояния
             if self._is_complete_path(current_path):
-                total_length = g_score + self.dist_matrix[current_path[-1]][start_city]
+                total_length = g_score + self.dist_matrix[current_path[-1], start_city]
                 if total_length < best_length:
                     best_length = total_length
                     best_path = current_path + [start_city]
@@ -229,7 +663,7 @@ class TSPSolver:
             unvisited = self._get_unvisited_cities(current_path)
             for next_city in unvisited:
                 new_path = current_path + [next_city]
-                new_g = g_score + self.dist_matrix[current_path[-1]][next_city]
+                new_g = g_score + self.dist_matrix[current_path[-1], next_city]
                 
                 # Эвристическая оценка
                 remaining = [c for c in unvisited if c != next_city]
@@ -255,30 +689,22 @@ class TSPSolver:
         return best_path, best_length
     
     # ============ СТРАТЕГИЯ 2: ЖАДНЫЙ ПОИСК ============
-    def greedy_search(self, start_city=0):
+    def greedy_search(self, start_city=0, spatial_index=None):
         """
         Жадный поиск: всегда выбирать ближайший непосещённый город
+        
+        spatial_index: искать ближайший город по KD-дереву, без
+                       матрицы расстояний (по умолчанию - для больших задач,
+                       где матрица не хранится)
         """
         print("\n=== ЖАДНЫЙ ПОИСК ===")
         start_time = time.time()
         
-        current_city = start_city
-        path = [current_city]
-        unvisited = set(range(self.n)) - {current_city}
-        total_length = 0
-        nodes_visited = 1
-        
-        while unvisited:
-            # Найти ближайший непосещённый город
-            nearest = min(unvisited, key=lambda city: self.dist_matrix[current_city][city])
-            total_length += self.dist_matrix[current_city][nearest]
-            current_city = nearest
-            path.append(current_city)
-            unvisited.remove(current_city)
-            nodes_visited += 1
+        path = self._nearest_neighbor_tour(start_city, spatial_index)
+        total_length = self._calculate_path_length(path)
+        nodes_visited = len(path)
         
         # Возврат в начальный город
-        total_length += self.dist_matrix[current_city][start_city]
         path.append(start_city)
         
         end_time = time.time()
@@ -290,7 +716,7 @@ class TSPSolver:
             'path': path
         }
         
-        print(f"Найденный путь: {path}")
+        print(f"Найденный путь: {self._format_path(path)}")
         print(f"Длина пути: {total_length:.2f}")
         print(f"Посещено узлов: {nodes_visited}")
         print(f"Время выполнения: {end_time - start_time:.4f} сек")
@@ -349,6 +775,772 @@ class TSPSolver:
         
         return current_path, current_length
     
+    # ============ ТОЧНЫЙ МЕТОД: ДИНАМИЧЕСКОЕ ПРОГРАММИРОВАНИЕ ХЕЛДА-КАРПА ============
+    def held_karp_search(self, start_city=0):
+        """
+        Алгоритм Хелда-Карпа (динамическое программирование по подмножествам)
+        
+        Состояние: (маска посещённых городов, последний город)
+        dp[маска, j] - длина кратчайшего пути из start_city через все города
+        маски с окончанием в j. Слои с одинаковым числом городов в маске
+        считаются векторно в NumPy. Память O(2^(n-1) * n), поэтому число
+        городов ограничено HELD_KARP_MAX_CITIES.
+        """
+        print("\n=== АЛГОРИТМ ХЕЛДА-КАРПА (ДП) ===")
+        if self.n > HELD_KARP_MAX_CITIES:
+            raise ValueError(f"Хелд-Карп поддерживает не более {HELD_KARP_MAX_CITIES} городов "
+                             f"(задано {self.n})")
+        start_time = time.time()
+        
+        # Биты маски соответствуют всем городам, кроме начального
+        others = np.array([city for city in range(self.n) if city != start_city], dtype=int)
+        m = len(others)
+        full = 1 << m
+        dist = np.asarray(self.dist_matrix[np.ix_(others, others)], dtype=float)
+        from_start = np.asarray(self.dist_matrix[start_city, others], dtype=float)
+        to_start = np.asarray(self.dist_matrix[others, start_city], dtype=float)
+        
+        dp = np.full((full, max(m, 1)), np.inf)
+        parent = np.full((full, max(m, 1)), -1, dtype=np.int8)
+        for j in range(m):
+            dp[1 << j, j] = from_start[j]
+        
+        masks = np.arange(full)
+        popcount = np.zeros(full, dtype=np.int8)
+        for bit in range(m):
+            popcount += (masks >> bit) & 1
+        
+        # Слои по числу городов в маске: переходы только из предыдущего слоя
+        for size in range(2, m + 1):
+            layer = masks[popcount == size]
+            for j in range(m):
+                subsets = layer[(layer >> j) & 1 == 1]
+                previous = subsets ^ (1 << j)
+                candidates = dp[previous] + dist[:, j]
+                best = np.argmin(candidates, axis=1)
+                dp[subsets, j] = candidates[np.arange(len(subsets)), best]
+                parent[subsets, j] = best
+        
+        if m == 0:
+            best_path = [start_city, start_city]
+            best_length = 0.0
+        else:
+            totals = dp[full - 1, :m] + to_start
+            last = int(np.argmin(totals))
+            best_length = float(totals[last])
+            
+            # Восстановление маршрута по указателям на предыдущий город
+            reversed_path = []
+            mask = full - 1
+            while mask:
+                reversed_path.append(int(others[last]))
+                previous_last = int(parent[mask, last])
+                mask ^= 1 << last
+                last = previous_last
+            best_path = [start_city] + reversed_path[::-1] + [start_city]
+        
+        end_time = time.time()
+        nodes_visited = m * (1 << max(m - 1, 0))
+        
+        self.stats['held_karp'] = {
+            'time': end_time - start_time,
+            'nodes_visited': nodes_visited,
+            'path_length': best_length,
+            'path': best_path
+        }
+        
+        print(f"Оптимальный путь: {best_path}")
+        print(f"Длина пути: {best_length:.2f}")
+        print(f"Состояний ДП: {nodes_visited}")
+        print(f"Время выполнения: {end_time - start_time:.4f} сек")
+        
+        return best_path, best_length
+    
+    # ============ ВСПОМОГАТЕЛЬНЫЕ ЭВРИСТИКИ ============
+    def _nearest_neighbor_tour(self, start_city=0, spatial_index=None):
+        """
+        Маршрут ближайшего соседа (без возврата в начало), без вывода
+        
+        spatial_index: искать по KDTreeIndex (по умолчанию - если матрица
+                       расстояний ленивая); иначе - по строкам матрицы
+        """
+        if spatial_index is None:
+            spatial_index = self.lazy
+        if spatial_index:
+            index = KDTreeIndex(self.coords)
+            index.remove(start_city)
+            tour = [start_city]
+            for _ in range(self.n - 1):
+                city = tour[-1]
+                nearest = index.nearest(index.xs[city], index.ys[city])
+                index.remove(nearest)
+                tour.append(nearest)
+            return tour
+        
+        tour = [start_city]
+        visited = np.zeros(self.n, dtype=bool)
+        visited[start_city] = True
+        current_city = start_city
+        for _ in range(self.n - 1):
+            row = np.where(visited, np.inf, self.dist_matrix[current_city])
+            current_city = int(np.argmin(row))
+            tour.append(current_city)
+            visited[current_city] = True
+        return tour
+    
+    def _two_opt(self, tour):
+        """
+        Улучшение маршрута 2-opt: для каждого ребра (a, b) изменения длины
+        от всех обменов (a, b), (c, d) -> (a, c), (b, d) считаются векторно
+        """
+        tour = np.array(tour, dtype=int)
+        n = len(tour)
+        if n < 4:
+            return tour.tolist()
+        
+        improved = True
+        while improved:
+            improved = False
+            for i in range(n - 2):
+                a, b = tour[i], tour[i + 1]
+                c = tour[i + 2:]
+                d = np.roll(tour, -1)[i + 2:]
+                delta = (self.dist_matrix[a, c] + self.dist_matrix[b, d]
+                         - self.dist_matrix[a, b] - self.dist_matrix[c, d])
+                best = int(np.argmin(delta))
+                if delta[best] < -1e-10:
+                    j = i + 2 + best
+                    tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1]
+                    improved = True
+        return tour.tolist()
+    
+    def _distance_function(self):
+        """Быстрое расстояние между двумя городами по координатам (для циклов Python)"""
+        xs = self.coords[:, 0].tolist()
+        ys = self.coords[:, 1].tolist()
+        hypot = math.hypot
+        
+        def dist(a, b):
+            return hypot(xs[a] - xs[b], ys[a] - ys[b])
+        
+        return dist
+    
+    def _candidate_neighbors(self, k=10, chunk_rows=512):
+        """
+        k ближайших городов для каждого города (по возрастанию расстояния)
+        
+        Считается по блокам строк из координат, матрица n x n не создаётся.
+        Результат кешируется.
+        """
+        k = min(k, self.n - 1)
+        cached = self._neighbors.get(k)
+        if cached is not None:
+            return cached
+        
+        neighbors = np.empty((self.n, k), dtype=np.int64)
+        squared = (self.coords * self.coords).sum(axis=1)
+        for lo in range(0, self.n, chunk_rows):
+            hi = min(lo + chunk_rows, self.n)
+            block = squared[lo:hi, np.newaxis] + squared[np.newaxis, :] - 2 * self.coords[lo:hi] @ self.coords.T
+            block[np.arange(hi - lo), np.arange(lo, hi)] = np.inf
+            nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(block, nearest, axis=1), axis=1)
+            neighbors[lo:hi] = np.take_along_axis(nearest, order, axis=1)
+        
+        self._neighbors[k] = neighbors
+        return neighbors
+    
+    def _improve_tour(self, tour, neighbors=10, or_opt=True, queue=None):
+        """
+        Локальный поиск 2-opt и Or-opt по спискам ближайших соседей
+        
+        Изменение длины от хода считается за O(1) по четырём-шести рёбрам.
+        Биты "не смотреть": город проверяется снова, только если у него
+        поменялось ребро; queue - начальная очередь городов (по умолчанию все).
+        
+        Returns:
+            число выполненных улучшающих ходов
+        """
+        dist = self._distance_function()
+        candidates = self._candidate_neighbors(neighbors).tolist()
+        n = tour.n
+        eps = 1e-10
+        queue = deque(tour.order if queue is None else queue)
+        active = [False] * n
+        for city in queue:
+            active[city] = True
+        moves = 0
+        
+        def wake(*cities):
+            for city in cities:
+                if not active[city]:
+                    active[city] = True
+                    queue.append(city)
+        
+        while queue:
+            a = queue.popleft()
+            active[a] = False
+            improved = False
+            
+            # 2-opt: ребро (a, b) заменяется на (a, c), c - близкий к a город
+            for forward in (True, False):
+                b = tour.next(a) if forward else tour.prev(a)
+                d_ab = dist(a, b)
+                for c in candidates[a]:
+                    d_ac = dist(a, c)
+                    if d_ac >= d_ab:
+                        break
+                    d = tour.next(c) if forward else tour.prev(c)
+                    if c == b or d == a:
+                        continue
+                    if d_ac + dist(b, d) - d_ab - dist(c, d) < -eps:
+                        if forward:
+                            tour.move(a, b, c, d)
+                        else:
+                            tour.move(b, a, d, c)
+                        wake(a, b, c, d)
+                        improved = True
+                        break
+                if improved:
+                    break
+            
+            # Or-opt: участок из 1-3 городов, начинающийся с a, переносится к c
+            if or_opt and not improved and n >= 8:
+                for forward in (True, False):
+                    step = tour.next if forward else tour.prev
+                    back = tour.prev if forward else tour.next
+                    p = back(a)
+                    s2 = a
+                    for length in (1, 2, 3):
+                        if length > 1:
+                            s2 = step(s2)
+                        q = step(s2)
+                        segment = (a, s2, back(s2))
+                        removal = dist(p, a) + dist(s2, q) - dist(p, q)
+                        if removal <= eps:
+                            continue
+                        for c in candidates[a]:
+                            d_ac = dist(a, c)
+                            if d_ac >= removal:
+                                break
+                            if c in segment or c == p:
+                                continue
+                            # Между c и следующим за ним: a рядом с c, без разворота
+                            d = step(c)
+                            if d not in segment and d != p and length > 1:
+                                if d_ac + dist(s2, d) - dist(c, d) < removal - eps:
+                                    tour.or_move(p, a, s2, q, c, d, True)
+                                    wake(p, q, a, s2, c, d)
+                                    improved = True
+                                    break
+                            # Между предыдущим e и c: a рядом с c, с разворотом
+                            e = back(c)
+                            if e not in segment:
+                                if dist(e, s2) + d_ac - dist(e, c) < removal - eps:
+                                    tour.or_move(p, a, s2, q, e, c, False)
+                                    wake(p, q, a, s2, c, e)
+                                    improved = True
+                                    break
+                        if improved:
+                            break
+                    if improved:
+                        break
+            
+            if improved:
+                moves += 1
+                wake(a)
+        
+        return moves
+    
+    def _lk_improve(self, tour, neighbors=8, max_depth=10, breadth=5, queue=None, deadline=None):
+        """
+        Улучшение маршрута ходами в стиле Лина-Кернигана
+        
+        Ход - цепочка последовательных обменов: из ребра (t1, t2) удаляется
+        t2 и добавляется ребро (t2, t3) к близкому городу, освобождая соседа
+        t4 города t3; каждое звено выполняется разворотом участка (2-opt),
+        суммарный выигрыш считается по удалённым и добавленным рёбрам.
+        Цепочка прерывается, когда выигрыш кончается или достигнута
+        глубина max_depth, затем откатывается до лучшего замыкания.
+        Добавленные в цепочке рёбра не удаляются. На первом уровне
+        перебираются breadth лучших вариантов t3. После момента deadline
+        (по time.time()) новые города из очереди не проверяются.
+        
+        Returns:
+            суммарное уменьшение длины маршрута
+        """
+        dist = self._distance_function()
+        candidates = self._candidate_neighbors(neighbors).tolist()
+        n = tour.n
+        eps = 1e-10
+        queue = deque(tour.order if queue is None else queue)
+        active = [False] * n
+        for city in queue:
+            active[city] = True
+        total_gain = 0.0
+        
+        def options(t1, t2, gain, added):
+            """Варианты (t3, t4, выигрыш после размыкания) для свободного конца t2"""
+            forward = tour.next(t1) == t2
+            far = tour.next(t2) if forward else tour.prev(t2)
+            result = []
+            for t3 in candidates[t2]:
+                g1 = gain - dist(t2, t3)
+                if g1 <= eps:
+                    break
+                if t3 == t1 or t3 == far:
+                    continue
+                t4 = tour.prev(t3) if forward else tour.next(t3)
+                if (min(t3, t4), max(t3, t4)) in added:
+                    continue
+                result.append((g1 + dist(t3, t4), t3, t4))
+            result.sort(reverse=True)
+            return result
+        
+        def chain(t1, t2, t3, t4):
+            """Цепочка с первым звеном (t3, t4); возвращает выигрыш и затронутые города"""
+            flips = []
+            added = set()
+            gain = dist(t1, t2)
+            best_gain, best_flips = 0.0, 0
+            while True:
+                tour.move(t2, t1, t3, t4)
+                flips.append((t2, t1, t3, t4))
+                added.add((min(t2, t3), max(t2, t3)))
+                gain += dist(t3, t4) - dist(t2, t3)
+                closed = gain - dist(t4, t1)
+                if closed > best_gain + eps:
+                    best_gain, best_flips = closed, len(flips)
+                t2 = t4
+                if len(flips) >= max_depth:
+                    break
+                next_options = options(t1, t2, gain, added)
+                if not next_options:
+                    break
+                _, t3, t4 = next_options[0]
+            
+            # Откат до лучшего замыкания цепочки
+            while len(flips) > best_flips:
+                a, b, c, d = flips.pop()
+                tour.move(a, c, b, d)
+            touched = set()
+            for flip in flips:
+                touched.update(flip)
+            return best_gain, touched
+        
+        while queue:
+            if deadline is not None and time.time() > deadline:
+                break
+            t1 = queue.popleft()
+            active[t1] = False
+            for t2 in (tour.next(t1), tour.prev(t1)):
+                gain = 0.0
+                for _, t3, t4 in options(t1, t2, dist(t1, t2), set())[:breadth]:
+                    gain, touched = chain(t1, t2, t3, t4)
+                    if gain > 0:
+                        break
+                if gain > 0:
+                    total_gain += gain
+                    for city in touched:
+                        if not active[city]:
+                            active[city] = True
+                            queue.append(city)
+                    if not active[t1]:
+                        active[t1] = True
+                        queue.append(t1)
+                    break
+        
+        return total_gain
+    
+    @staticmethod
+    def _one_tree(costs):
+        """
+        1-дерево: минимальное остовное дерево на вершинах 1..k (алгоритм Прима)
+        плюс два самых дешёвых ребра из вершины 0
+        
+        Returns:
+            (вес, степени вершин)
+        """
+        size = len(costs)
+        degrees = np.zeros(size, dtype=int)
+        in_tree = np.zeros(size, dtype=bool)
+        in_tree[0] = in_tree[1] = True
+        key = costs[1].copy()
+        key[in_tree] = np.inf
+        parent = np.ones(size, dtype=int)
+        total = 0.0
+        
+        for _ in range(size - 2):
+            v = int(np.argmin(key))
+            total += key[v]
+            degrees[v] += 1
+            degrees[parent[v]] += 1
+            in_tree[v] = True
+            key[v] = np.inf
+            closer = (costs[v] < key) & ~in_tree
+            key[closer] = costs[v][closer]
+            parent[closer] = v
+        
+        two = np.argpartition(costs[0, 1:], 1)[:2] + 1
+        total += costs[0, two].sum()
+        degrees[0] = 2
+        degrees[two] += 1
+        return total, degrees
+    
+    # ============ МЕТОД ВЕТВЕЙ И ГРАНИЦ ============
+    def branch_and_bound_search(self, start_city=0, time_limit=None,
+                                root_iterations=100, node_iterations=10):
+        """
+        Метод ветвей и границ (поиск в глубину с отсечениями)
+        
+        Состояние: (последний город, битовая маска посещённых, длина пути).
+        Путь хранится в одном общем стеке, без копирования списков.
+        
+        Нижняя граница для достройки пути last -> (непосещённые) -> start:
+        1-дерево с лагранжевыми штрафами (оценка Хелда-Карпа) на городах
+        start, last и непосещённых с закреплённым ребром start-last,
+        штрафы уточняются субградиентом. Потомок начинает со штрафов
+        родителя, поэтому ему хватает нескольких итераций.
+        Начальная верхняя граница - ближайший сосед, улучшенный 2-opt.
+        
+        Args:
+            time_limit: ограничение времени, сек (тогда оптимальность
+                        может быть не доказана)
+            root_iterations: итераций субградиента в корне
+            node_iterations: итераций субградиента в остальных узлах
+        """
+        print("\n=== МЕТОД ВЕТВЕЙ И ГРАНИЦ ===")
+        start_time = time.time()
+        dist = np.asarray(self.dist_matrix[np.ix_(range(self.n), range(self.n))], dtype=float)
+        
+        tour = self._two_opt(self._nearest_neighbor_tour(start_city))
+        shift = tour.index(start_city)
+        tour = tour[shift:] + tour[:shift]
+        best = {'length': self._calculate_path_length(tour), 'path': tour + [start_city]}
+        
+        nodes_visited = 0
+        timed_out = False
+        path = [start_city]
+        # Ребро start-last, которое обязано попасть в 1-дерево
+        forced_cost = dist.sum() + 1.0
+        
+        def lower_bound(last, remaining, length, penalties, iterations):
+            """Оценка Хелда-Карпа для достройки; возвращает (граница, штрафы)"""
+            k = len(remaining)
+            if k == 1:
+                r = remaining[0]
+                return dist[last, r] + dist[r, start_city], penalties
+            if k == 2:
+                r, s = remaining
+                exact = min(dist[last, r] + dist[r, s] + dist[s, start_city],
+                            dist[last, s] + dist[s, r] + dist[r, start_city])
+                return exact, penalties
+            
+            # Путь last -> remaining -> start вместе с фиктивным ребром
+            # start-last нулевой длины - гамильтонов цикл; start - особая
+            # вершина 1-дерева, ребро start-last в нём закреплено
+            nodes = [start_city] + ([last] if last != start_city else []) + remaining
+            costs = dist[np.ix_(nodes, nodes)]
+            np.fill_diagonal(costs, np.inf)
+            forced = forced_cost if last != start_city else 0.0
+            if forced:
+                costs[0, 1] = costs[1, 0] = -forced
+            
+            pi = penalties[nodes]
+            gap = best['length'] - length
+            bound = -np.inf
+            best_pi = pi.copy()
+            step_scale = 1.0
+            for _ in range(iterations):
+                weight, degrees = self._one_tree(costs + pi[:, np.newaxis] + pi[np.newaxis, :])
+                value = weight + forced - 2 * pi.sum()
+                if value > bound:
+                    bound = value
+                    best_pi = pi.copy()
+                if bound >= gap - 1e-9:
+                    break
+                subgradient = degrees - 2
+                norm = (subgradient * subgradient).sum()
+                if norm == 0:
+                    break
+                pi = pi + step_scale * (gap - value) / norm * subgradient
+                step_scale *= 0.95
+            
+            child_penalties = penalties.copy()
+            child_penalties[nodes] = best_pi
+            return bound, child_penalties
+        
+        def expand(last, mask, length, penalties):
+            nonlocal nodes_visited, timed_out
+            nodes_visited += 1
+            if time_limit is not None and time.time() - start_time > time_limit:
+                timed_out = True
+                return
+            
+            remaining = [city for city in range(self.n) if not mask >> city & 1]
+            if not remaining:
+                total = length + dist[last, start_city]
+                if total < best['length'] - 1e-9:
+                    best['length'] = total
+                    best['path'] = path + [start_city]
+                return
+            
+            # Ближайшие города первыми: быстрее находятся хорошие маршруты
+            for city in sorted(remaining, key=lambda c: dist[last, c]):
+                child_length = length + dist[last, city]
+                if child_length >= best['length'] - 1e-9:
+                    continue
+                child_remaining = [c for c in remaining if c != city]
+                if child_remaining:
+                    bound, child_penalties = lower_bound(
+                        city, child_remaining, child_length, penalties, node_iterations)
+                    if child_length + bound >= best['length'] - 1e-9:
+                        continue
+                else:
+                    child_penalties = penalties
+                
+                path.append(city)
+                expand(city, mask | (1 << city), child_length, child_penalties)
+                path.pop()
+                if timed_out:
+                    return
+        
+        remaining = [city for city in range(self.n) if city != start_city]
+        if remaining:
+            root_bound, root_penalties = lower_bound(
+                start_city, remaining, 0.0, np.zeros(self.n), root_iterations)
+            if root_bound < best['length'] - 1e-9:
+                expand(start_city, 1 << start_city, 0.0, root_penalties)
+        
+        end_time = time.time()
+        best_path, best_length = best['path'], best['length']
+        
+        self.stats['branch_and_bound'] = {
+            'time': end_time - start_time,
+            'nodes_visited': nodes_visited,
+            'path_length': best_length,
+            'path': best_path,
+            'proven_optimal': not timed_out
+        }
+        
+        print(f"Лучший путь: {best_path}")
+        print(f"Длина пути: {best_length:.2f}")
+        print(f"Посещено узлов: {nodes_visited}")
+        print(f"Оптимальность доказана: {'да' if not timed_out else 'нет (лимит времени)'}")
+        print(f"Время выполнения: {end_time - start_time:.4f} сек")
+        
+        return best_path, best_length
+    
+    # ============ ЛОКАЛЬНЫЙ ПОИСК: 2-OPT И OR-OPT ============
+    def local_search(self, start_city=0, neighbors=10, or_opt=True, initial_path=None):
+        """
+        Локальный поиск 2-opt + Or-opt со списками ближайших соседей
+        
+        В отличие от backward_search, ход не пересобирает маршрут и не
+        пересчитывает его длину: маршрут хранится массивом с позициями
+        городов, изменение длины считается за O(1), рассматриваются только
+        ходы к neighbors ближайшим городам.
+        
+        Args:
+            neighbors: размер списка кандидатов для каждого города
+            or_opt: выполнять перенос участков из 1-3 городов
+            initial_path: начальный маршрут (по умолчанию - маршрут жадного поиска)
+        """
+        print("\n=== ЛОКАЛЬНЫЙ ПОИСК (2-opt + Or-opt) ===")
+        start_time = time.time()
+        
+        if initial_path is None:
+            initial_path = self._nearest_neighbor_tour(start_city)
+        tour = _ArrayTour(initial_path[:self.n])
+        initial_length = self._calculate_path_length(tour.order)
+        
+        moves = self._improve_tour(tour, neighbors, or_opt) if self.n >= 5 else 0
+        
+        path = tour.to_path(start_city)
+        total_length = self._calculate_path_length(path[:-1])
+        end_time = time.time()
+        
+        self.stats['local_search'] = {
+            'time': end_time - start_time,
+            'iterations': moves,
+            'path_length': total_length,
+            'path': path
+        }
+        
+        print(f"Найденный путь: {self._format_path(path)}")
+        print(f"Длина пути: {total_length:.2f} (начальный маршрут: {initial_length:.2f})")
+        print(f"Улучшающих ходов: {moves}")
+        print(f"Время выполнения: {end_time - start_time:.4f} сек")
+        
+        return path, total_length
+    
+    # ============ ЛИН-КЕРНИГАН ============
+    def lin_kernighan_search(self, start_city=0, time_limit=10.0, neighbors=8, max_depth=10,
+                             seed=0, kick_span=50, initial_path=None):
+        """
+        Цепной Лин-Керниган (Chained LK)
+        
+        Маршрут жадного поиска улучшается 2-opt + Or-opt, затем ходами
+        _lk_improve (с учётом ограничения времени). Пока не кончится время, маршрут встряхивается
+        локальным ходом double-bridge (три разреза в пределах kick_span
+        позиций), и LK восстанавливает его, начиная только с концов
+        изменённых рёбер; результат принимается, если он не длиннее
+        текущего, иначе маршрут возвращается к прежнему.
+        
+        Args:
+            time_limit: ограничение времени, сек
+            neighbors: размер списка кандидатов
+            max_depth: максимальная длина цепочки обменов
+            seed: семя генератора встрясок
+            kick_span: размах встряски в позициях маршрута
+            initial_path: начальный маршрут (по умолчанию - маршрут жадного поиска)
+        """
+        print("\n=== ЦЕПНОЙ ЛИН-КЕРНИГАН ===")
+        start_time = time.time()
+        rng = np.random.default_rng(seed)
+        dist = self._distance_function()
+        
+        if initial_path is None:
+            initial_path = self._nearest_neighbor_tour(start_city)
+        tour = _ArrayTour(initial_path[:self.n])
+        if self.n >= 5:
+            self._improve_tour(tour, neighbors)
+            self._lk_improve(tour, neighbors, max_depth, deadline=start_time + time_limit)
+        current_length = self._calculate_path_length(tour.order)
+        best_order, best_pos = tour.order[:], tour.pos[:]
+        
+        kicks = accepted = 0
+        while self.n >= 8 and time.time() - start_time < time_limit:
+            ends = tour.double_bridge(rng, kick_span)
+            a, b, c, d, e, f = ends
+            kick_delta = (dist(a, d) + dist(e, b) + dist(c, f)
+                          - dist(a, b) - dist(c, d) - dist(e, f))
+            gain = self._lk_improve(tour, neighbors, max_depth, queue=ends)
+            kicks += 1
+            
+            new_length = current_length + kick_delta - gain
+            if new_length <= current_length + 1e-10:
+                current_length = new_length
+                best_order, best_pos = tour.order[:], tour.pos[:]
+                accepted += 1
+            else:
+                tour.order, tour.pos = best_order[:], best_pos[:]
+        
+        path = tour.to_path(start_city)
+        total_length = self._calculate_path_length(path[:-1])
+        end_time = time.time()
+        
+        self.stats['lin_kernighan'] = {
+            'time': end_time - start_time,
+            'iterations': kicks,
+            'path_length': total_length,
+            'path': path
+        }
+        
+        print(f"Найденный путь: {self._format_path(path)}")
+        print(f"Длина пути: {total_length:.2f}")
+        print(f"Встрясок: {kicks} (принято: {accepted})")
+        print(f"Время выполнения: {end_time - start_time:.4f} сек")
+        
+        return path, total_length
+    
+    # ============ ПАРАЛЛЕЛЬНЫЙ МУЛЬТИСТАРТ ============
+    def multistart_search(self, start_city=0, time_budget=10.0, restarts=None,
+                          n_workers=None, seed=0, neighbors=10, start_method=None):
+        """
+        Мультистарт локального поиска в пуле процессов
+        
+        Каждый перезапуск - маршрут ближайшего соседа из случайного города
+        со случайными ходами double-bridge, улучшенный _improve_tour; у
+        перезапуска своё семя (seed + номер). Координаты, матрица расстояний
+        и списки соседей передаются процессам только для чтения через
+        multiprocessing.shared_memory, а не копируются в каждую задачу.
+        
+        Args:
+            time_budget: ограничение по времени, сек (новые перезапуски после
+                         него не начинаются, незавершённые отбрасываются);
+                         None - без ограничения
+            restarts: число перезапусков (None - пока не кончится время)
+            n_workers: число процессов (по умолчанию - число ядер)
+            seed: начальное семя
+            neighbors: размер списков кандидатов
+            start_method: способ запуска процессов ('fork', 'spawn', ...)
+        """
+        print("\n=== ПАРАЛЛЕЛЬНЫЙ МУЛЬТИСТАРТ ===")
+        start_time = time.time()
+        deadline = math.inf if time_budget is None else start_time + time_budget
+        n_workers = n_workers or os.cpu_count() or 1
+        total = float('inf') if restarts is None else restarts
+        
+        arrays = [self.coords, None if self.lazy else self.dist_matrix,
+                  self._candidate_neighbors(neighbors)]
+        segments = []
+        specs = []
+        for array in arrays:
+            if array is None:
+                specs.append(None)
+                continue
+            segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+            segments.append(segment)
+            specs.append((segment.name, array.shape, array.dtype.str))
+        
+        results = Queue()
+        best = None
+        submitted = completed = 0
+        try:
+            context = multiprocessing.get_context(start_method)
+            with context.Pool(n_workers, initializer=_multistart_worker_init, initargs=tuple(specs)) as pool:
+                while True:
+                    while (submitted < total and submitted - completed < 2 * n_workers
+                           and time.time() < deadline):
+                        pool.apply_async(_multistart_restart, ((seed + submitted, deadline, neighbors),),
+                                         callback=results.put, error_callback=results.put)
+                        submitted += 1
+                    if completed == submitted:
+                        break
+                    # Хотя бы один перезапуск дожидается и после окончания времени
+                    timeout = None if best is None or deadline == math.inf else deadline - time.time()
+                    if timeout is not None and timeout <= 0:
+                        break
+                    try:
+                        result = results.get(timeout=timeout)
+                    except Empty:
+                        break
+                    completed += 1
+                    if isinstance(result, BaseException):
+                        raise result
+                    if result is not None and (best is None or result[0] < best[0]):
+                        best = result
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+        
+        if best is None:
+            # Бюджет кончился раньше первого перезапуска
+            tour = _ArrayTour(self._nearest_neighbor_tour(start_city))
+            best = (self._calculate_path_length(tour.order), tour.order, None)
+        path = _ArrayTour(best[1]).to_path(start_city)
+        total_length = self._calculate_path_length(path[:-1])
+        end_time = time.time()
+        
+        self.stats['multistart'] = {
+            'time': end_time - start_time,
+            'iterations': completed,
+            'path_length': total_length,
+            'path': path,
+            'workers': n_workers,
+            'best_seed': best[2]
+        }
+        
+        print(f"Лучший путь: {self._format_path(path)}")
+        print(f"Длина пути: {total_length:.2f}")
+        print(f"Перезапусков: {completed} (процессов: {n_workers}, лучшее семя: {best[2]})")
+        print(f"Время выполнения: {end_time - start_time:.4f} сек")
+        
+        return path, total_length
+    
     # ============ СРАВНЕНИЕ СТРАТЕГИЙ ============
     def compare_strategies(self):
         """Вывод сравнительной таблицы"""
@@ -364,13 +1556,18 @@ class TSPSolver:
                 'dfs': 'Поиск в глубину',
                 'astar': 'A* поиск',
                 'greedy': 'Жадный поиск',
-                'backward': 'Обратный поиск'
+                'backward': 'Обратный поиск',
+                'held_karp': 'Хелд-Карп (ДП)',
+                'branch_and_bound': 'Ветви и границы',
+                'local_search': 'Локальный поиск',
+                'multistart': 'Мультистарт',
+                'lin_kernighan': 'Лин-Керниган'
             }
             
             nodes = stats.get('nodes_visited', stats.get('iterations', '-'))
             optimal = "✓" if stats['path_length'] == min(s['path_length'] for s in self.stats.values()) else "–"
             
-            print(f"{strategy_names[name]:<20} {stats['time']:<15.4f} {nodes:<15} {stats['path_length']:<15.2f} {optimal}")
+            print(f"{strategy_names.get(name, name):<20} {stats['time']:<15.4f} {nodes:<15} {stats['path_length']:<15.2f} {optimal}")
         
         print("="*80)
     
@@ -380,11 +1577,195 @@ class TSPSolver:
         print("Последовательность посещения городов:")
         for i, city in enumerate(path):
             if i < len(path) - 1:
-                print(f"  Город {city} → Город {path[i+1]} (расстояние: {self.dist_matrix[city][path[i+1]]:.2f})")
+                print(f"  Город {city} → Город {path[i+1]} (расстояние: {self.dist_matrix[city, path[i+1]]:.2f})")
             else:
                 print(f"  [Завершение маршрута]")
 
 
+# ============ ФОРМАТ TSPLIB ============
+
+# Поддерживаемые типы расстояний TSPLIB (города с координатами на плоскости)
+TSPLIB_EDGE_TYPES = ('EUC_2D', 'CEIL_2D', 'ATT')
+
+
+def load_tsplib(filename):
+    """
+    Чтение задачи TSPLIB (.tsp) с координатами городов
+    
+    Файл читается построчно, координаты записываются сразу в массив
+    n x 2 (n - из поля DIMENSION), без промежуточных списков; массив
+    можно передать прямо в TSPSolver.
+    
+    Returns:
+        (координаты, заголовок) - заголовок: словарь полей NAME, TYPE,
+        DIMENSION, EDGE_WEIGHT_TYPE, ...
+    """
+    header = {}
+    coords = None
+    count = 0
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if coords is None:
+                if line == 'EOF':
+                    break
+                key, sep, value = line.partition(':')
+                key = key.strip().upper()
+                if sep:
+                    header[key] = value.strip()
+                    continue
+                if key != 'NODE_COORD_SECTION':
+                    raise ValueError(f"Раздел {key} не поддерживается (нужны координаты городов)")
+                edge_type = header.get('EDGE_WEIGHT_TYPE', 'EUC_2D').upper()
+                if edge_type not in TSPLIB_EDGE_TYPES:
+                    raise ValueError(f"Тип расстояний {edge_type} не поддерживается "
+                                     f"(поддерживаются: {', '.join(TSPLIB_EDGE_TYPES)})")
+                if 'DIMENSION' not in header:
+                    raise ValueError("В заголовке нет поля DIMENSION")
+                coords = np.empty((int(header['DIMENSION']), 2))
+                continue
+            
+            fields = line.split()
+            if line == 'EOF' or not fields[0].lstrip('+-').isdigit():
+                # Конец раздела координат (EOF или следующий раздел)
+                break
+            index = int(fields[0]) - 1
+            if not 0 <= index < len(coords):
+                raise ValueError(f"Номер города {index + 1} вне диапазона 1..{len(coords)}")
+            coords[index, 0] = float(fields[1])
+            coords[index, 1] = float(fields[2])
+            count += 1
+    
+    if coords is None:
+        raise ValueError(f"В файле {filename} нет раздела NODE_COORD_SECTION")
+    if count != len(coords):
+        raise ValueError(f"Прочитано {count} городов, в заголовке DIMENSION = {len(coords)}")
+    return coords, header
+
+
+def read_tsplib_tour(filename):
+    """Чтение маршрута TSPLIB (.opt.tour): список номеров городов с нуля"""
+    tour = []
+    in_section = False
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if not in_section:
+                in_section = line.upper().startswith('TOUR_SECTION')
+                continue
+            for token in line.split():
+                if token == '-1' or token == 'EOF':
+                    return tour
+                tour.append(int(token) - 1)
+    return tour
+
+
+def tsplib_tour_length(coords, path, edge_weight_type='EUC_2D'):
+    """
+    Длина маршрута в целочисленной метрике TSPLIB (в ней заданы
+    известные оптимумы): EUC_2D - округление, CEIL_2D - вверх, ATT -
+    псевдоевклидово расстояние
+    """
+    path = np.asarray(path)
+    if len(path) > 1 and path[0] == path[-1]:
+        path = path[:-1]
+    diff = coords[path] - coords[np.roll(path, -1)]
+    squared = (diff * diff).sum(axis=1)
+    edge_weight_type = edge_weight_type.upper()
+    if edge_weight_type == 'EUC_2D':
+        lengths = np.floor(np.sqrt(squared) + 0.5)
+    elif edge_weight_type == 'CEIL_2D':
+        lengths = np.ceil(np.sqrt(squared))
+    elif edge_weight_type == 'ATT':
+        r = np.sqrt(squared / 10.0)
+        t = np.floor(r + 0.5)
+        lengths = np.where(t < r, t + 1, t)
+    else:
+        raise ValueError(f"Тип расстояний {edge_weight_type} не поддерживается")
+    return int(lengths.sum())
+
+
+# ============ ПРОЦЕССЫ МУЛЬТИСТАРТА ============
+
+# Решатель процесса пула и его блоки общей памяти
+_MULTISTART_WORKER = {}
+
+
+def _multistart_worker_init(coords_spec, matrix_spec, neighbors_spec):
+    """Инициализация процесса пула: подключение к общей памяти (только чтение)"""
+    segments = []
+    
+    def attach(spec):
+        name, shape, dtype = spec
+        segment = shared_memory.SharedMemory(name=name)
+        segments.append(segment)
+        array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+        array.flags.writeable = False
+        return array
+    
+    # Матрицу передает только неленивый родитель; без нее расстояния тоже
+    # ленивые (иначе каждый процесс строил бы свою плотную матрицу)
+    matrix = attach(matrix_spec) if matrix_spec is not None else None
+    solver = TSPSolver(attach(coords_spec), lazy=matrix is None, dist_matrix=matrix)
+    neighbors = attach(neighbors_spec)
+    solver._neighbors[neighbors.shape[1]] = neighbors
+    _MULTISTART_WORKER['solver'] = solver
+    _MULTISTART_WORKER['segments'] = segments
+
+
+def _multistart_restart(task):
+    """Один перезапуск: (длина, маршрут, семя) или None, если время вышло"""
+    seed, deadline, neighbors = task
+    if time.time() >= deadline:
+        return None
+    solver = _MULTISTART_WORKER['solver']
+    rng = np.random.default_rng(seed)
+    
+    tour = _ArrayTour(solver._nearest_neighbor_tour(int(rng.integers(solver.n))))
+    for _ in range(1 + solver.n // 100):
+        tour.double_bridge(rng)
+    solver._improve_tour(tour, neighbors)
+    return solver._calculate_path_length(tour.order), tour.order, seed
+
+
+def benchmark_multistart_scaling(solver, restarts=16, max_workers=None, seed=0, neighbors=10):
+    """
+    Замер масштабирования multistart_search от 1 до max_workers процессов
+    при одинаковом числе перезапусков
+    
+    Returns:
+        список словарей: workers, seconds, restarts_per_sec, speedup, path_length
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    results = []
+    base_time = None
+    workers = 1
+    while True:
+        start_time = time.perf_counter()
+        _, length = solver.multistart_search(time_budget=None, restarts=restarts,
+                                             n_workers=workers, seed=seed, neighbors=neighbors)
+        elapsed = time.perf_counter() - start_time
+        
+        base_time = base_time or elapsed
+        results.append({
+            'workers': workers,
+            'seconds': elapsed,
+            'restarts_per_sec': restarts / elapsed,
+            'speedup': base_time / elapsed,
+            'path_length': length
+        })
+        print(f"Процессов: {workers:3d}  Время: {elapsed:8.3f} с  "
+              f"Перезапусков/с: {restarts / elapsed:8.2f}  Ускорение: {base_time / elapsed:5.2f}x")
+        
+        if workers >= max_workers:
+            break
+        workers = min(workers * 2, max_workers)
+    
+    return results
+
+
 # ============ ПРИМЕР ИСПОЛЬЗОВАНИЯ ============
 if __name__ == "__main__":
     print("ЛАБОРАТОРНАЯ РАБОТА №7")
@@ -415,7 +1796,7 @@ if __name__ == "__main__":
     for i in range(solver.n):
         print(f"Город {i}: ", end="")
         for j in range(solver.n):
-            print(f"{solver.dist_matrix[i][j]:6.2f}", end=" ")
+            print(f"{solver.dist_matrix[i, j]:6.2f}", end=" ")
         print()
     
     # Запуск всех стратегий
@@ -436,6 +1817,21 @@ if __name__ == "__main__":
     # 5. Обратный поиск
     solver.backward_search(start_city)
     
+    # 6. Хелд-Карп (точное решение)
+    solver.held_karp_search(start_city)
+    
+    # 7. Метод ветвей и границ (точное решение)
+    solver.branch_and_bound_search(start_city)
+    
+    # 8. Локальный поиск 2-opt + Or-opt
+    solver.local_search(start_city)
+    
+    # 9. Параллельный мультистарт локального поиска
+    solver.multistart_search(start_city, restarts=4, n_workers=2)
+    
+    # 10. Цепной Лин-Керниган
+    solver.lin_kernighan_search(start_city, time_limit=1.0)
+    
     # Сравнение стратегий
     solver.compare_strategies()
     